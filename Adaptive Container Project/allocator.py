@@ -0,0 +1,194 @@
+import time
+
+import numpy as np
+
+from objective import DEFAULT_WEIGHTS
+
+# List-scheduling heuristics: container order fed to the greedy placement.
+# Execution time is length / MIPS (uniformly related VMs), so the container
+# Min-Min picks next is always the shortest one left and Max-Min's is the
+# longest: both reduce to one sorted pass instead of O(n^2) rescans.
+HEURISTICS = {
+    "min-min": "Min-Min (shortest containers first)",
+    "max-min": "Max-Min (longest containers first)",
+    "eft": "Earliest finish time (input order)",
+}
+RULES = ("objective", "finish_time")
+# Default wall-clock budget (seconds) of allocate(), list scheduling included
+TIME_LIMIT = 5.0
+
+
+# === Problem Arrays ===
+class AllocationProblem:
+    """Containers and VMs as NumPy arrays for fast incremental scoring.
+
+    The weighted objective of evaluate_allocation splits into a makespan
+    part and a part that is linear in each VM's busy time T_v:
+        alpha * M + gamma * M * sum(p_idle of used VMs)
+        + sum_v T_v * (beta * cost_per_sec_v + gamma * (p_max_v - p_idle_v))
+    """
+
+    def __init__(self, containers, vms, weights=DEFAULT_WEIGHTS):
+        self.length = np.array([c["length"] for c in containers], dtype=np.float64)
+        self.mips = np.array([vm["mips"] for vm in vms], dtype=np.float64)
+        self.p_idle = np.array([vm["p_idle"] for vm in vms], dtype=np.float64)
+        cost = np.array([vm["cost_per_sec"] for vm in vms], dtype=np.float64)
+        p_max = np.array([vm["p_max"] for vm in vms], dtype=np.float64)
+        self.alpha = weights["alpha"]
+        self.gamma = weights["gamma"]
+        # Objective added per second of busy time on each VM
+        self.rate = weights["beta"] * cost + weights["gamma"] * (p_max - self.p_idle)
+
+    def loads(self, allocation):
+        # allocation holds 0-based VM indexes -> (busy time per VM, containers per VM)
+        busy = np.bincount(allocation, weights=self.length / self.mips[allocation], minlength=len(self.mips))
+        counts = np.bincount(allocation, minlength=len(self.mips))
+        return busy, counts
+
+    def objective(self, busy, counts):
+        makespan = busy.max(initial=0.0)
+        idle = self.p_idle[counts > 0].sum()
+        return (self.alpha + self.gamma * idle) * makespan + float(self.rate @ busy)
+
+
+# === List Scheduling ===
+def _place(problem, order, rule):
+    n_vms = len(problem.mips)
+    allocation = np.empty(len(problem.length), dtype=np.int64)
+    busy = np.zeros(n_vms)
+    used = np.zeros(n_vms, dtype=bool)
+    makespan = 0.0
+    idle = 0.0
+    inv_mips = 1.0 / problem.mips
+    for i in order.tolist():
+        exec_time = problem.length[i] * inv_mips
+        finish = busy + exec_time
+        if rule == "finish_time":
+            v = int(np.argmin(finish))
+        else:
+            # Increase of the weighted objective for every candidate VM
+            new_makespan = np.maximum(finish, makespan)
+            new_idle = idle + np.where(used, 0.0, problem.p_idle)
+            delta = ((problem.alpha + problem.gamma * new_idle) * new_makespan
+                     - (problem.alpha + problem.gamma * idle) * makespan
+                     + problem.rate * exec_time)
+            best = delta.min()
+            # Ties (common when the makespan term is flat) go to the earliest finish
+            v = int(np.argmin(np.where(delta <= best + 1e-12 * max(1.0, abs(best)), finish, np.inf)))
+        allocation[i] = v
+        busy[v] = finish[v]
+        if not used[v]:
+            used[v] = True
+            idle += problem.p_idle[v]
+        makespan = max(makespan, busy[v])
+    return allocation
+
+
+def list_schedule(containers, vms, heuristic="min-min", weights=DEFAULT_WEIGHTS, rule="objective"):
+    """Greedy allocation; returns 1-based VM indexes like a hand-typed allocation.
+
+    rule="finish_time" places each container on the VM where it finishes
+    first (the textbook heuristics); rule="objective" places it where the
+    weighted makespan/cost/energy objective grows the least.
+    """
+    if heuristic not in HEURISTICS:
+        raise ValueError(f"Unknown heuristic '{heuristic}', expected one of {tuple(HEURISTICS)}")
+    if rule not in RULES:
+        raise ValueError(f"Unknown placement rule '{rule}', expected one of {RULES}")
+    problem = AllocationProblem(containers, vms, weights)
+    if heuristic == "min-min":
+        order = np.argsort(problem.length, kind="stable")
+    elif heuristic == "max-min":
+        order = np.argsort(-problem.length, kind="stable")
+    else:
+        order = np.arange(len(problem.length))
+    return (_place(problem, order, rule) + 1).tolist()
+
+
+# === Local Search ===
+def _best_relocation(problem, i, a, busy, counts, top, linear, idle):
+    # Objective after moving container i from VM a to every VM b
+    exec_a = problem.length[i] / problem.mips[a]
+    exec_b = problem.length[i] / problem.mips
+    busy_a = busy[a] - exec_a
+    new_busy = busy + exec_b
+
+    # Makespan of the VMs other than a and b, from the three busiest VMs
+    rest = np.full(len(busy), 0.0)
+    others = [v for v in top if v != a]
+    if others:
+        rest[:] = busy[others[0]]
+        if len(others) > 1:
+            rest[others[0]] = busy[others[1]]
+    new_makespan = np.maximum(np.maximum(rest, busy_a), new_busy)
+
+    new_idle = (idle - (problem.p_idle[a] if counts[a] == 1 else 0.0)
+                + np.where(counts > 0, 0.0, problem.p_idle))
+    new_idle[a] = idle
+    new_linear = linear - problem.rate[a] * exec_a + problem.rate * exec_b
+    value = (problem.alpha + problem.gamma * new_idle) * new_makespan + new_linear
+    value[a] = np.inf
+    b = int(np.argmin(value))
+    return b, value[b]
+
+
+def local_search(containers, vms, allocation, weights=DEFAULT_WEIGHTS, max_passes=10, time_limit=None, seed=None):
+    """Improve an allocation by relocating single containers between VMs.
+
+    Each pass tries the containers on the busiest VM first (they set the
+    makespan), then every other container in random order, moving each to
+    the VM that lowers the weighted objective most. Stops after a pass
+    without improvement, max_passes or time_limit seconds.
+    Returns (allocation with 1-based VM indexes, objective).
+    """
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    problem = AllocationProblem(containers, vms, weights)
+    alloc = np.asarray(allocation, dtype=np.int64) - 1
+    busy, counts = problem.loads(alloc)
+    current = problem.objective(busy, counts)
+    n_vms = len(busy)
+    linear = float(problem.rate @ busy)
+    idle = problem.p_idle[counts > 0].sum()
+
+    for _ in range(max_passes):
+        improved = False
+        critical = int(np.argmax(busy))
+        on_critical = np.flatnonzero(alloc == critical)
+        rest = rng.permutation(np.flatnonzero(alloc != critical))
+        for i in np.concatenate([on_critical, rest]).tolist():
+            if time_limit is not None and time.perf_counter() - start >= time_limit:
+                return (alloc + 1).tolist(), problem.objective(busy, counts)
+            a = int(alloc[i])
+            top = np.argpartition(busy, -3)[-3:] if n_vms > 3 else np.arange(n_vms)
+            top = top[np.argsort(-busy[top])].tolist()
+            b, value = _best_relocation(problem, i, a, busy, counts, top, linear, idle)
+            if value < current - 1e-9 * max(1.0, abs(current)):
+                exec_a = problem.length[i] / problem.mips[a]
+                exec_b = problem.length[i] / problem.mips[b]
+                busy[a] -= exec_a
+                busy[b] += exec_b
+                linear += problem.rate[b] * exec_b - problem.rate[a] * exec_a
+                counts[a] -= 1
+                counts[b] += 1
+                idle += (problem.p_idle[b] if counts[b] == 1 else 0.0) - (problem.p_idle[a] if counts[a] == 0 else 0.0)
+                alloc[i] = b
+                current = value
+                improved = True
+        if not improved:
+            break
+    # Re-score from scratch so float drift never reaches the caller
+    busy, counts = problem.loads(alloc)
+    return (alloc + 1).tolist(), problem.objective(busy, counts)
+
+
+def allocate(containers, vms, heuristic="min-min", weights=DEFAULT_WEIGHTS, rule="objective",
+             improve=True, max_passes=10, time_limit=TIME_LIMIT, seed=None):
+    # List scheduling followed (optionally) by local search; 1-based VM indexes.
+    # Local search gets whatever is left of time_limit (None: run all passes)
+    start = time.perf_counter()
+    allocation = list_schedule(containers, vms, heuristic, weights, rule)
+    if improve:
+        remaining = None if time_limit is None else max(0.0, time_limit - (time.perf_counter() - start))
+        allocation = local_search(containers, vms, allocation, weights, max_passes, remaining, seed)[0]
+    return allocation
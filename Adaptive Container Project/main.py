@@ -1,4 +1,4 @@
-from collections import defaultdict
+from objective import DEFAULT_WEIGHTS, evaluate_allocation
 
 print("\n--- Adaptive Container Placement ---")
 
@@ -20,52 +20,55 @@ for i in range(m):
     p_max = float(input("Max Power (W): "))
     vms.append({"id": i+1, "mips": mips, "cost_per_sec": cost, "p_idle": p_idle, "p_max": p_max})
 
-print("\n--- Container to VM Allocation ---")
-print("(Enter VM index starting from 1 for each container)")
-allocation = []
-for i, c in enumerate(containers):
-    a = int(input(f"Assign container {c['name']} to VM (1-{m}): "))
-    allocation.append(a)
-
 # === Calculation ===
-weights = {"alpha": 1, "beta": 1, "gamma": 1}
-vm_exec_times = defaultdict(float)
-vm_costs = defaultdict(float)
-vm_energies = defaultdict(float)
-
-for i, container in enumerate(containers):
-    vm_id = allocation[i] - 1
-    vm = vms[vm_id]
-
-    exec_time = container["length"] / vm["mips"]
-    vm_exec_times[vm_id] += exec_time
-    vm_costs[vm_id] += exec_time * vm["cost_per_sec"]
+weights = DEFAULT_WEIGHTS
 
-makespan = max(vm_exec_times.values())
-
-for vm_id, exec_time in vm_exec_times.items():
-    vm = vms[vm_id]
-    usage_ratio = exec_time / makespan
-    power = vm["p_idle"] + (vm["p_max"] - vm["p_idle"]) * usage_ratio
-    energy = power * makespan
-    vm_energies[vm_id] = energy
-
-total_cost = sum(vm_costs.values())
-total_energy = sum(vm_energies.values())
+print("\n--- Container to VM Allocation ---")
+while True:
+    method = input("Allocation method (manual, min-min, max-min, eft, pareto) [manual]: ").strip().lower() or "manual"
+    if method in ("manual", "pareto"):
+        break
+    from allocator import HEURISTICS
+    if method in HEURISTICS:
+        break
+    print(f"Enter one of: manual, {', '.join(HEURISTICS)}, pareto.")
+if method == "manual":
+    print("(Enter VM index starting from 1 for each container)")
+    allocation = []
+    for i, c in enumerate(containers):
+        a = int(input(f"Assign container {c['name']} to VM (1-{m}): "))
+        allocation.append(a)
+elif method == "pareto":
+    # Makespan / cost / energy front; the trade-off is picked instead of weighted
+    from pareto import choose, nsga2
+    front = nsga2(containers, vms)
+    print(f"{'#':>3} {'Makespan (s)':>14} {'Cost (₹)':>12} {'Energy (J)':>14}")
+    for k, entry in enumerate(front, 1):
+        print(f"{k:>3} {entry['makespan']:>14.2f} {entry['total_cost']:>12.2f} {entry['total_energy']:>14.2f}")
+    default = front.index(choose(front)) + 1
+    while True:
+        pick = input(f"Choose a trade-off (1-{len(front)}) [{default}]: ").strip() or str(default)
+        if pick.isdigit() and 1 <= int(pick) <= len(front):
+            break
+        print(f"Enter a number from 1 to {len(front)}.")
+    allocation = front[int(pick) - 1]["allocation"]
+    for c, a in zip(containers, allocation):
+        print(f"Container {c['name']} -> VM{a}")
+else:
+    # List scheduling + local search on the same weighted objective (needs NumPy)
+    from allocator import allocate
+    allocation = allocate(containers, vms, heuristic=method, weights=weights)
+    for c, a in zip(containers, allocation):
+        print(f"Container {c['name']} -> VM{a}")
+result = evaluate_allocation(containers, vms, allocation, weights)
 
 # === Output ===
 print("\n--- Results ---")
-print("VM Execution Times:", dict(vm_exec_times))
-print("VM Costs:", dict(vm_costs))
-print("VM Energies:", dict(vm_energies))
-print(f"\nMakespan: {makespan:.2f} sec")
-print(f"Total Cost: ₹{total_cost:.2f}")
-print(f"Total Energy: {total_energy:.2f} Joules")
-
-obj_score = (
-    weights["alpha"] * makespan +
-    weights["beta"] * total_cost +
-    weights["gamma"] * total_energy
-)
+print("VM Execution Times:", result["vm_exec_times"])
+print("VM Costs:", result["vm_costs"])
+print("VM Energies:", result["vm_energies"])
+print(f"\nMakespan: {result['makespan']:.2f} sec")
+print(f"Total Cost: ₹{result['total_cost']:.2f}")
+print(f"Total Energy: {result['total_energy']:.2f} Joules")
 
-print(f"Objective Score: {obj_score:.2f}")
+print(f"Objective Score: {result['objective']:.2f}")
@@ -0,0 +1,115 @@
+from collections import defaultdict
+
+DEFAULT_WEIGHTS = {"alpha": 1, "beta": 1, "gamma": 1}
+
+
+# === Objective ===
+def evaluate_allocation(containers, vms, allocation, weights=DEFAULT_WEIGHTS):
+    """Score a container-to-VM allocation (1-based VM index per container).
+
+    Returns makespan, cost and energy per VM and in total, plus the
+    weighted objective score.
+    """
+    vm_exec_times = defaultdict(float)
+    vm_costs = defaultdict(float)
+    vm_energies = defaultdict(float)
+
+    for i, container in enumerate(containers):
+        vm_id = allocation[i] - 1
+        vm = vms[vm_id]
+
+        exec_time = container["length"] / vm["mips"]
+        vm_exec_times[vm_id] += exec_time
+        vm_costs[vm_id] += exec_time * vm["cost_per_sec"]
+
+    makespan = max(vm_exec_times.values())
+
+    for vm_id, exec_time in vm_exec_times.items():
+        vm = vms[vm_id]
+        usage_ratio = exec_time / makespan
+        power = vm["p_idle"] + (vm["p_max"] - vm["p_idle"]) * usage_ratio
+        energy = power * makespan
+        vm_energies[vm_id] = energy
+
+    total_cost = sum(vm_costs.values())
+    total_energy = sum(vm_energies.values())
+
+    obj_score = (
+        weights["alpha"] * makespan +
+        weights["beta"] * total_cost +
+        weights["gamma"] * total_energy
+    )
+
+    return {
+        "vm_exec_times": dict(vm_exec_times),
+        "vm_costs": dict(vm_costs),
+        "vm_energies": dict(vm_energies),
+        "makespan": makespan,
+        "total_cost": total_cost,
+        "total_energy": total_energy,
+        "objective": obj_score,
+    }
+
+
+# === Batch Objective ===
+def evaluate_allocations(containers, vms, allocations, weights=DEFAULT_WEIGHTS, per_vm=False, chunk_size=1 << 22):
+    """Score a (candidates x containers) matrix of 1-based VM indexes at once.
+
+    Same model as evaluate_allocation, computed with NumPy (imported here so
+    the scalar path keeps working without it). Returns arrays of length
+    candidates for makespan, total_cost, total_energy and objective, plus
+    vm_exec_times (candidates x VMs) when per_vm is set. Rows are processed
+    in chunks of about chunk_size cells per (rows x containers) or
+    (rows x VMs) block, so without per_vm memory stays bounded by the chunk.
+    """
+    import numpy as np
+
+    allocations = np.asarray(allocations, dtype=np.int64)
+    if allocations.ndim == 1:
+        allocations = allocations[np.newaxis, :]
+    n_rows, n_containers = allocations.shape
+    length = np.array([c["length"] for c in containers], dtype=np.float64)
+    mips = np.array([vm["mips"] for vm in vms], dtype=np.float64)
+    cost_per_sec = np.array([vm["cost_per_sec"] for vm in vms], dtype=np.float64)
+    p_idle = np.array([vm["p_idle"] for vm in vms], dtype=np.float64)
+    p_max = np.array([vm["p_max"] for vm in vms], dtype=np.float64)
+    n_vms = len(vms)
+    if n_containers != len(length):
+        raise ValueError(f"allocations have {n_containers} columns for {len(length)} containers")
+    if allocations.size and (allocations.min() < 1 or allocations.max() > n_vms):
+        raise ValueError(f"allocations must hold VM indexes between 1 and {n_vms}")
+
+    # Execution time of every container on every VM, gathered per candidate
+    exec_table = (length[:, np.newaxis] / mips[np.newaxis, :]).ravel()
+    column = (np.arange(n_containers) * n_vms)[np.newaxis, :]
+
+    makespan = np.empty(n_rows)
+    total_cost = np.empty(n_rows)
+    total_energy = np.empty(n_rows)
+    vm_exec_times = np.empty((n_rows, n_vms)) if per_vm else None
+    # A chunk holds rows x containers gathered times and rows x VMs busy sums
+    step = max(1, chunk_size // max(1, n_containers, n_vms))
+    for start in range(0, n_rows, step):
+        block = allocations[start:start + step] - 1
+        rows = len(block)
+        exec_time = exec_table[column + block]
+        slots = (block + (np.arange(rows) * n_vms)[:, np.newaxis]).ravel()
+        busy = np.bincount(slots, weights=exec_time.ravel(), minlength=rows * n_vms).reshape(rows, n_vms)
+        used = np.bincount(slots, minlength=rows * n_vms).reshape(rows, n_vms) > 0
+        span = busy.max(axis=1, initial=0.0)
+        makespan[start:start + rows] = span
+        total_cost[start:start + rows] = busy @ cost_per_sec
+        # Each used VM draws p_idle for the whole makespan plus (p_max - p_idle) while busy
+        total_energy[start:start + rows] = span * (used @ p_idle) + busy @ (p_max - p_idle)
+        if per_vm:
+            vm_exec_times[start:start + rows] = busy
+
+    result = {
+        "makespan": makespan,
+        "total_cost": total_cost,
+        "total_energy": total_energy,
+        "objective": weights["alpha"] * makespan + weights["beta"] * total_cost + weights["gamma"] * total_energy,
+    }
+    if per_vm:
+        result["vm_exec_times"] = vm_exec_times
+    return result
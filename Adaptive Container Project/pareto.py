@@ -0,0 +1,168 @@
+import time
+
+import numpy as np
+
+from allocator import HEURISTICS, RULES, list_schedule
+from objective import evaluate_allocations
+
+# Minimized together: no weights, the trade-off is picked from the front afterwards
+OBJECTIVES = ("makespan", "total_cost", "total_energy")
+
+
+# === Non-dominated Sorting ===
+def non_dominated_sort(scores):
+    """Split rows of a (candidates x objectives) array into Pareto fronts.
+
+    Returns a list of index arrays, best front first.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    # dominates[i, j]: i is no worse than j everywhere and better somewhere
+    no_worse = (scores[:, np.newaxis, :] <= scores[np.newaxis, :, :]).all(axis=2)
+    better = (scores[:, np.newaxis, :] < scores[np.newaxis, :, :]).any(axis=2)
+    dominates = no_worse & better
+    dominated_by = dominates.sum(axis=0)
+    fronts = []
+    current = np.flatnonzero(dominated_by == 0)
+    while len(current):
+        fronts.append(current)
+        dominated_by = dominated_by - dominates[current].sum(axis=0)
+        dominated_by[current] = -1
+        current = np.flatnonzero(dominated_by == 0)
+    return fronts
+
+
+def crowding_distance(scores):
+    # NSGA-II crowding distance within one front; boundary points get inf
+    n = len(scores)
+    distance = np.zeros(n)
+    if n <= 2:
+        distance[:] = np.inf
+        return distance
+    for k in range(scores.shape[1]):
+        order = np.argsort(scores[:, k], kind="stable")
+        values = scores[order, k]
+        distance[order[[0, -1]]] = np.inf
+        spread = values[-1] - values[0]
+        if spread > 0:
+            distance[order[1:-1]] += (values[2:] - values[:-2]) / spread
+    return distance
+
+
+def _rank(scores):
+    # (front index, crowding distance) for every row
+    rank = np.empty(len(scores), dtype=np.int64)
+    crowding = np.empty(len(scores))
+    for r, front in enumerate(non_dominated_sort(scores)):
+        rank[front] = r
+        crowding[front] = crowding_distance(scores[front])
+    return rank, crowding
+
+
+# === NSGA-II ===
+def _score(containers, vms, population):
+    result = evaluate_allocations(containers, vms, population + 1)
+    return np.column_stack([result[name] for name in OBJECTIVES])
+
+
+def _initial_population(containers, vms, size, rng):
+    # The list-scheduling allocations seed the extremes, the rest is random
+    seeds = [list_schedule(containers, vms, heuristic, rule=rule)
+             for rule in RULES for heuristic in HEURISTICS]
+    population = rng.integers(0, len(vms), size=(size, len(containers)))
+    seeds = np.unique(np.array(seeds, dtype=np.int64) - 1, axis=0)[:size]
+    population[:len(seeds)] = seeds
+    return population
+
+
+def _tournament(rank, crowding, n, rng):
+    # Binary tournament: lower front wins, then larger crowding distance
+    a = rng.integers(0, len(rank), n)
+    b = rng.integers(0, len(rank), n)
+    a_wins = (rank[a] < rank[b]) | ((rank[a] == rank[b]) & (crowding[a] >= crowding[b]))
+    return np.where(a_wins, a, b)
+
+
+def _offspring(population, rank, crowding, n_vms, crossover_rate, mutation_rate, rng):
+    size, n_containers = population.shape
+    parents = population[_tournament(rank, crowding, 2 * size, rng)]
+    first, second = parents[:size], parents[size:]
+    # Uniform crossover for the pairs selected for it
+    mix = (rng.random((size, n_containers)) < 0.5) & (rng.random((size, 1)) < crossover_rate)
+    children = np.where(mix, second, first)
+    # Mutation: reassign single containers to a random VM
+    mutate = rng.random((size, n_containers)) < mutation_rate
+    children[mutate] = rng.integers(0, n_vms, int(mutate.sum()))
+    return children
+
+
+def nsga2(containers, vms, population_size=100, generations=200, crossover_rate=0.9, mutation_rate=None,
+          time_limit=None, seed=None):
+    """Multi-objective search for allocations trading off makespan, cost and energy.
+
+    NSGA-II with uniform crossover and reassignment mutation (default rate
+    1 / containers). Each generation's offspring are scored together with
+    evaluate_allocations. Stops after generations or time_limit seconds.
+    Returns the non-dominated allocations, see pareto_front.
+    """
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    n_vms = len(vms)
+    if mutation_rate is None:
+        mutation_rate = 1.0 / max(1, len(containers))
+    population = _initial_population(containers, vms, population_size, rng)
+    scores = _score(containers, vms, population)
+    rank, crowding = _rank(scores)
+
+    for _ in range(generations):
+        if time_limit is not None and time.perf_counter() - start >= time_limit:
+            break
+        children = _offspring(population, rank, crowding, n_vms, crossover_rate, mutation_rate, rng)
+        merged = np.concatenate([population, children])
+        merged_scores = np.concatenate([scores, _score(containers, vms, children)])
+        # Drop duplicate allocations so copies of one solution cannot fill the front
+        merged, unique = np.unique(merged, axis=0, return_index=True)
+        merged_scores = merged_scores[unique]
+
+        # Elitist survival: whole fronts first, the last one cut by crowding distance
+        survivors = []
+        for front in non_dominated_sort(merged_scores):
+            if len(survivors) + len(front) <= population_size:
+                survivors.extend(front.tolist())
+                continue
+            distance = crowding_distance(merged_scores[front])
+            survivors.extend(front[np.argsort(-distance, kind="stable")[:population_size - len(survivors)]].tolist())
+            break
+        population = merged[survivors]
+        scores = merged_scores[survivors]
+        rank, crowding = _rank(scores)
+
+    return pareto_front(containers, vms, population[rank == 0] + 1)
+
+
+def pareto_front(containers, vms, allocations):
+    """Non-dominated subset of 1-based allocations, sorted by makespan.
+
+    Each entry holds the allocation and its makespan, total_cost and total_energy.
+    """
+    allocations = np.unique(np.asarray(allocations, dtype=np.int64), axis=0)
+    result = evaluate_allocations(containers, vms, allocations)
+    scores = np.column_stack([result[name] for name in OBJECTIVES])
+    front = non_dominated_sort(scores)[0]
+    front = front[np.lexsort(scores[front].T[::-1])]
+    return [{"allocation": allocations[i].tolist(), **{name: float(scores[i, k]) for k, name in enumerate(OBJECTIVES)}}
+            for i in front]
+
+
+# === Trade-off Selection ===
+def choose(front, weights=None):
+    """Pick one entry of a front by weights on the objectives normalized to [0, 1].
+
+    weights maps OBJECTIVES names to importance (default: all equal), so
+    units no longer matter: 1 on each means the point closest to the ideal.
+    """
+    weights = weights or {}
+    scores = np.array([[entry[name] for name in OBJECTIVES] for entry in front], dtype=np.float64)
+    low, high = scores.min(axis=0), scores.max(axis=0)
+    spread = np.where(high > low, high - low, 1.0)
+    w = np.array([weights.get(name, 1.0) for name in OBJECTIVES], dtype=np.float64)
+    return front[int(np.argmin(((scores - low) / spread) @ w))]
@@ -1,5 +1,7 @@
 # app.py
 import streamlit as st
+from instance import Instance
+from packing import MODES, pack, placement_report
 
 st.title("⚙️ Power-Aware VM Placement Simulator")
 
@@ -19,38 +21,25 @@ for i in range(num_pms):
     cap = st.number_input(f"Enter CPU capacity of PM{i+1} (%)", min_value=1, max_value=1000, step=1, key=f"pm_{i}")
     pm_capacity.append(cap)
 
-# Step 3: Run placement algorithm when button clicked
+# Step 3: Choose packing mode and run placement algorithm when button clicked
+mode = st.selectbox("Packing mode", list(MODES), index=list(MODES).index("ffd"), format_func=MODES.get)
+
 if st.button("🚀 Run Placement Algorithm"):
     P_idle = 162
     P_busy = 215
-    power_diff = P_busy - P_idle
-
-    pm_used = [0] * num_pms
-    vm_allocation = [-1] * num_vms
 
+    instance = Instance(vm_cpu, pm_capacity)
+    vm_allocation = pack(instance.vm_cpu, instance.pm_cpu, mode)
     for i in range(num_vms):
-        placed = False
-        for j in range(num_pms):
-            if pm_used[j] + vm_cpu[i] <= pm_capacity[j]:
-                pm_used[j] += vm_cpu[i]
-                vm_allocation[i] = j
-                placed = True
-                break
-        if not placed:
+        if vm_allocation[i] == -1:
             st.warning(f"❌ VM{i+1} could not be placed!")
 
     # Power Calculation
-    total_power = 0
+    pm_used, utilization, pm_power, total_power = placement_report(vm_allocation, instance.vm_cpu, instance.pm_cpu,
+                                                                   P_idle, P_busy)
     st.subheader("🔌 Power Consumption per PM")
     for i in range(num_pms):
-        if pm_used[i] > 0:
-            utilization = pm_used[i] / pm_capacity[i]
-            power = P_idle + (utilization * power_diff)
-        else:
-            utilization = 0
-            power = 0
-        st.write(f"PM{i+1}: Utilized = {utilization*100:.1f}%, Power = {power:.2f}W")
-        total_power += power
+        st.write(f"PM{i+1}: Utilized = {utilization[i]*100:.1f}%, Power = {pm_power[i]:.2f}W")
 
     st.subheader("📦 VM Allocation")
     for i in range(num_vms):
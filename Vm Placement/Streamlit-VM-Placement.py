@@ -1,8 +1,26 @@
 import streamlit as st
+import json
+import os
 import random
+import time
+from contextlib import nullcontext
+from functools import partial
 import numpy as np
-import matplotlib.pyplot as plt
 import pandas as pd
+from instance import Instance
+from dfa import optimize
+from capacity_index import POLICIES, repair_solution
+from island_dfa import island_optimize
+from background_run import OptimizationJob
+from stopping import StoppingCriteria
+from bounds import lower_bound, optimality_gap
+from instrumentation import profiling
+from warm_start import adapt_placement, load_placement
+from consolidation import consolidate
+from result_cache import ResultCache, cache_key, instance_fingerprint
+from charts import fleet_chart_png
+from export import (PARQUET_AVAILABLE, assignment_table, csv_bytes, num_pages, page, parquet_bytes, plan_table,
+                    utilization_table)
 
 # DFA Parameters
 P_idle = 162
@@ -17,6 +35,47 @@ st.set_page_config(page_title="🔥 VM Placement Optimizer", layout="centered")
 
 st.title("🔥 Power-Aware VM Placement using Discrete Firefly Algorithm")
 
+@st.cache_data(max_entries=8)
+def generate_instance(num_vms, num_pms, seed):
+    rng = random.Random(seed)
+    VMs = [{"id": f"VM{i+1}", "cpu": rng.randint(5, 20)} for i in range(num_vms)]
+    PMs = [{"id": f"PM{i+1}", "cpu": rng.randint(30, 60)} for i in range(num_pms)]
+    return VMs, PMs
+
+@st.cache_resource
+def get_result_cache():
+    # Shared by every session, so reloads and repeat runs skip re-optimizing
+    return ResultCache(maxsize=32)
+
+@st.cache_data(max_entries=16)
+def fleet_chart(result_key, _pm_ids, _utilization, _pm_power):
+    # Rendered once per result; the arrays follow from result_key so they are not hashed
+    return fleet_chart_png(_pm_ids, _utilization, _pm_power)
+
+@st.cache_data(max_entries=16)
+def table_csv(result_key, name, _table):
+    # Encoded once per result and table; reruns reuse the bytes
+    return csv_bytes(_table)
+
+@st.cache_data(max_entries=16)
+def table_parquet(result_key, name, _table):
+    return parquet_bytes(_table)
+
+def show_table(title, table, name, result_key):
+    # One page of a large table at a time, plus full CSV / Parquet downloads
+    st.subheader(title)
+    page_size = st.selectbox("Rows per page", [50, 100, 500, 1000], index=1, key=f"{name}_page_size")
+    pages = num_pages(table, page_size)
+    number = st.number_input(f"Page (1-{pages})", min_value=1, max_value=pages, value=1, key=f"{name}_page")
+    st.dataframe(pd.DataFrame(page(table, number, page_size)))
+    col_csv, col_parquet = st.columns(2)
+    col_csv.download_button("📥 Download CSV", data=table_csv(result_key, name, table), file_name=f"{name}.csv",
+                            mime="text/csv", key=f"{name}_csv")
+    if PARQUET_AVAILABLE:
+        col_parquet.download_button("📥 Download Parquet", data=table_parquet(result_key, name, table),
+                                    file_name=f"{name}.parquet", mime="application/octet-stream",
+                                    key=f"{name}_parquet")
+
 # Input Mode
 mode = st.radio("Select Input Mode", ["Auto-generate", "Manual Input"])
 
@@ -27,10 +86,16 @@ PMs = []
 if mode == "Auto-generate":
     num_vms = st.slider("Number of VMs", 1, 5000, 100)
     num_pms = st.slider("Number of PMs", 1, 3000, 100)
-    for i in range(num_vms):
-        VMs.append({"id": f"VM{i+1}", "cpu": random.randint(5, 20)})
-    for i in range(num_pms):
-        PMs.append({"id": f"PM{i+1}", "cpu": random.randint(30, 60)})
+    # The generator seed lives in the URL so the instance survives reruns and page reloads
+    regenerate = st.button("🎲 Regenerate Instance")
+    try:
+        seed = int(st.query_params["seed"])
+    except (KeyError, ValueError):
+        seed = None
+    if seed is None or regenerate:
+        seed = random.randrange(2**31)
+        st.query_params["seed"] = str(seed)
+    VMs, PMs = generate_instance(num_vms, num_pms, seed)
 else:
     num_vms = st.number_input("Enter number of VMs", min_value=1, max_value=5000, step=1)
     num_pms = st.number_input("Enter number of PMs", min_value=1, max_value=3000, step=1)
@@ -41,123 +106,207 @@ else:
         cpu = st.number_input(f"CPU for PM{i+1}", min_value=1, step=1, key=f"pm{i}")
         PMs.append({"id": f"PM{i+1}", "cpu": cpu})
 
+repair_policy = st.selectbox("Repair Policy (for VMs that overflow their PM)", POLICIES,
+                             format_func=lambda p: f"{p.capitalize()}-fit")
+n_islands = st.slider("Parallel Islands (1 = single-core DFA)", 1, 16, 1)
+workers = st.number_input("Worker Processes", min_value=1, max_value=os.cpu_count() or 1,
+                          value=min(n_islands, os.cpu_count() or 1), step=1, disabled=n_islands == 1)
+
+with st.expander("⏱️ Stopping Criteria (0 = off)"):
+    stall_generations = st.number_input("Stop after N generations without improvement", min_value=0, value=0, step=1)
+    target_power = st.number_input("Stop once total power is at most (W)", min_value=0.0, value=0.0, step=100.0)
+    time_limit = st.number_input("Wall-clock deadline (s)", min_value=0.0, value=0.0, step=1.0)
+    max_evaluations = st.number_input("Maximum move evaluations", min_value=0, value=0, step=1000)
+    max_gap = st.number_input("Stop once the optimality gap is at most (%)", min_value=0.0, max_value=100.0,
+                              value=0.0, step=1.0)
+stopping_params = {"stall_generations": int(stall_generations) or None, "target_cost": target_power or None,
+                   "time_limit": time_limit or None, "max_evaluations": int(max_evaluations) or None,
+                   "max_gap": max_gap / 100 or None}
+collect_profile = st.checkbox("🔬 Collect profiling counters (evaluations, repairs, hot-path timers)")
+
+with st.expander("♻️ Warm Start / Consolidation"):
+    st.caption("Start from an earlier placement instead of from scratch; new VMs and VMs on removed PMs are re-homed.")
+    warm_file = st.file_uploader("Previous placement (assignment CSV export or JSON {VM ID: PM ID})",
+                                 type=["csv", "json"])
+    use_kept = st.checkbox("Warm start from the kept placement", disabled="warm_placement" not in st.session_state)
+    consolidate_mode = st.checkbox("🚚 Consolidate: treat the previous placement as live and plan the migrations")
+    st.caption("Consolidation minimizes power plus the migration cost below (single swarm, islands are not used) "
+               "and orders the migrations so no PM is ever over capacity.")
+    migration_cost = st.number_input("Migration cost (W per migrated VM)", min_value=0.0, value=0.0, step=5.0,
+                                     disabled=not consolidate_mode)
+    max_migrations = st.number_input("Migration budget (0 = no limit)", min_value=0, value=0, step=1,
+                                     disabled=not consolidate_mode)
+previous_placement = None
+if warm_file is not None:
+    try:
+        previous_placement = load_placement(warm_file.getvalue().decode("utf-8"))
+    except ValueError as e:
+        st.error(f"❌ Could not read the previous placement: {e}")
+elif use_kept:
+    previous_placement = st.session_state.get("warm_placement")
+
 # DFA Utility Functions
-def power_consumption(assignments):
-    usage = [0] * len(PMs)
-    pm_power = [0] * len(PMs)
-    for vm_idx, pm_idx in enumerate(assignments):
-        usage[pm_idx] += VMs[vm_idx]["cpu"]
-    total_power = 0
-    for i, u in enumerate(usage):
-        if u > 0:
-            utilization = u / PMs[i]["cpu"]
-            power = P_idle + (P_busy - P_idle) * utilization
-            pm_power[i] = power
-            total_power += power
-        else:
-            pm_power[i] = 0
-    return total_power, pm_power, usage
-
-def generate_firefly():
-    firefly = []
-    pm_idx = 0
-    for vm_idx in range(len(VMs)):
-        firefly.append(pm_idx)
-        pm_idx = (pm_idx + 1) % len(PMs)
-    return firefly
-
-def move_firefly(f1, f2):
-    new_f = f1[:]
-    for i in range(len(VMs)):
-        if random.random() < beta0 * np.exp(-gamma * (f1[i] - f2[i])**2):
-            new_f[i] = f2[i]
-        if random.random() < alpha:
-            new_f[i] = random.randint(0, len(PMs) - 1)
-    return repair_solution(new_f)
-
-def repair_solution(solution):
-    pm_resources = [PMs[i]["cpu"] for i in range(len(PMs))]
-    for vm_idx, pm_idx in enumerate(solution):
-        vm_cpu = VMs[vm_idx]["cpu"]
-        if vm_cpu > pm_resources[pm_idx]:
-            for new_pm_idx in range(len(PMs)):
-                if vm_cpu <= pm_resources[new_pm_idx]:
-                    solution[vm_idx] = new_pm_idx
-                    pm_resources[new_pm_idx] -= vm_cpu
-                    break
+instance = Instance.from_dicts(VMs, PMs)
+vm_cpu, pm_cpu = instance.vm_cpu, instance.pm_cpu
+initial = None
+if previous_placement and VMs and PMs:
+    initial, warm_unplaced = adapt_placement(instance, previous_placement, repair_policy)
+    kept = sum(1 for vm_id, pm_id in previous_placement.items()
+               if vm_id in instance.vm_index and initial[instance.vm_index[vm_id]] >= 0
+               and instance.pm_ids[initial[instance.vm_index[vm_id]]] == pm_id)
+    st.caption(f"♻️ Warm start keeps {kept} of {instance.num_vms} VMs on their previous PM"
+               + (f", {len(warm_unplaced)} VM(s) do not fit anywhere" if warm_unplaced else ""))
+consolidation = None
+if consolidate_mode:
+    if initial is None:
+        st.warning("🚚 Consolidation needs a previous placement (upload one or keep a result).")
+    elif warm_unplaced:
+        st.error("❌ Consolidation needs every VM placed; the previous placement leaves some without a PM.")
+    else:
+        consolidation = {"migration_cost": migration_cost, "max_migrations": int(max_migrations) or None}
+
+def run_dfa(vm_cpu, pm_cpu, repair_policy, n_islands, workers, stopping_params, collect_profile, initial=None,
+            consolidation=None, progress=None, cancel=None):
+    # Runs in the background job thread; always returns
+    # (best_solution, best_cost, island_stats, stopping_summary, profile, migration_plan)
+    plan = None
+    with profiling() if collect_profile else nullcontext() as profiler:
+        if consolidation is not None:
+            best_solution, best_cost, plan, stopping = solve_consolidation(
+                vm_cpu, pm_cpu, initial, consolidation, stopping_params, progress, cancel)
+            island_stats = None
         else:
-            pm_resources[pm_idx] -= vm_cpu
-    return solution
+            best_solution, best_cost, island_stats, stopping = solve_dfa(
+                vm_cpu, pm_cpu, repair_policy, n_islands, workers, stopping_params, initial, progress, cancel)
+    profile = profiler.snapshot() if collect_profile else None
+    return best_solution, best_cost, island_stats, stopping.summary(), profile, plan
+
+def solve_dfa(vm_cpu, pm_cpu, repair_policy, n_islands, workers, stopping_params, initial, progress, cancel):
+    stopping = StoppingCriteria(**stopping_params)
+    island_stats = None
+    if n_islands > 1:
+        best_solution, best_cost, island_stats = island_optimize(
+            vm_cpu, pm_cpu, n_islands=n_islands, workers=workers, num_fireflies=max(num_fireflies, 2 * n_islands),
+            iterations=iterations, alpha=alpha, beta0=beta0, gamma=gamma, p_idle=P_idle, p_busy=P_busy,
+            repair_policy=repair_policy, progress=progress, cancel=cancel, stopping=stopping, initial=initial)
+    else:
+        best_solution, best_cost = optimize(vm_cpu, pm_cpu, num_fireflies=num_fireflies, iterations=iterations,
+                                            alpha=alpha, beta0=beta0, gamma=gamma, p_idle=P_idle, p_busy=P_busy,
+                                            repair_policy=repair_policy, progress=progress, cancel=cancel,
+                                            stopping=stopping, initial=initial)
+    return best_solution, best_cost, island_stats, stopping
+
+def solve_consolidation(vm_cpu, pm_cpu, current, consolidation, stopping_params, progress, cancel):
+    stopping = StoppingCriteria(**stopping_params)
+    best_solution, best_cost, plan = consolidate(
+        vm_cpu[:, np.newaxis], pm_cpu[:, np.newaxis], current, n_fireflies=num_fireflies, max_gen=iterations,
+        stopping=stopping, progress=progress, cancel=cancel, **consolidation)
+    return best_solution, best_cost, plan, stopping
 
 # Run DFA
-if st.button("Run DFA Optimization"):
+result_cache = get_result_cache()
+key = cache_key(instance_fingerprint(vm_cpu, pm_cpu), num_fireflies=num_fireflies, iterations=iterations,
+                alpha=alpha, beta0=beta0, gamma=gamma, p_idle=P_idle, p_busy=P_busy,
+                repair_policy=repair_policy, n_islands=n_islands, collect_profile=collect_profile,
+                warm_start=instance_fingerprint(initial) if initial is not None else None,
+                consolidation=tuple(sorted(consolidation.items())) if consolidation else None, **stopping_params)
+
+if st.button("Run DFA Optimization", disabled="job" in st.session_state):
     if not VMs or not PMs:
         st.error("❌ Please provide valid VM and PM data.")
     else:
-        st.info("⏳ Optimization in progress... please wait.")
-        fireflies = [generate_firefly() for _ in range(num_fireflies)]
-        costs = [power_consumption(f)[0] for f in fireflies]
-
-        best_solution = fireflies[np.argmin(costs)]
-        best_cost = min(costs)
-
-        for gen in range(iterations):
-            for i in range(num_fireflies):
-                for j in range(num_fireflies):
-                    if costs[j] < costs[i]:
-                        new_solution = move_firefly(fireflies[i], fireflies[j])
-                        new_cost = power_consumption(new_solution)[0]
-                        if new_cost < costs[i]:
-                            fireflies[i] = new_solution
-                            costs[i] = new_cost
-                            if new_cost < best_cost:
-                                best_solution = new_solution[:]
-                                best_cost = new_cost
-
-        total, pm_power, pm_usage = power_consumption(best_solution)
-
-        st.success("✅ Optimization Complete")
-        st.markdown(f"### ⚡ Total Power Consumption: **{round(total, 2)} W**")
-
-        if num_vms <= 500:
-            assignment_data = {
-                "VM ID": [vm["id"] for vm in VMs],
-                "Assigned PM": [PMs[pm_idx]["id"] for pm_idx in best_solution],
-                "VM CPU": [vm["cpu"] for vm in VMs]
-            }
-            st.subheader("🧩 VM to PM Assignment")
-            st.dataframe(pd.DataFrame(assignment_data))
+        cached = result_cache.get(key)
+        if cached is not None:
+            st.session_state["result"] = {"key": key, "value": cached, "status": "cached", "history": []}
         else:
-            st.warning("📋 Assignment data too large to display! Please reduce VMs or export data to CSV.")
-
-        if num_pms <= 500:
-            utilization_data = {
-                "PM ID": [pm["id"] for pm in PMs],
-                "CPU Capacity": [pm["cpu"] for pm in PMs],
-                "Used CPU": pm_usage,
-                "Utilization (%)": [round((pm_usage[i] / PMs[i]["cpu"]) * 100, 1) for i in range(len(PMs))],
-                "Power (W)": [round(p, 2) for p in pm_power]
-            }
-            st.subheader("📊 PM Utilization and Power")
-            st.dataframe(pd.DataFrame(utilization_data))
+            target = partial(run_dfa, vm_cpu, pm_cpu, repair_policy, n_islands, int(workers), stopping_params,
+                             collect_profile, initial, consolidation)
+            st.session_state["job"] = (key, OptimizationJob(target, iterations).start())
+            st.session_state.pop("result", None)
+
+if "job" in st.session_state:
+    job_key, job = st.session_state["job"]
+    progress = job.snapshot()
+    if job.running:
+        best_text = f" - best {progress['best_cost']:.2f} W" if progress["best_cost"] is not None else ""
+        st.progress(progress["fraction"], text=f"⏳ Generation {progress['generation']}/{progress['total_generations']}"
+                                               f"{best_text} ({progress['elapsed']:.1f}s)")
+        if progress["history"]:
+            st.line_chart(pd.DataFrame({"Best Power (W)": progress["history"]}))
+        if st.button("⏹️ Cancel Optimization"):
+            job.cancel()
+        time.sleep(0.5)
+        st.rerun()
+    else:
+        del st.session_state["job"]
+        if job.status == "error":
+            st.error(f"❌ Optimization failed: {job.error}")
         else:
-            st.warning("📋 Utilization data too large to display! Please reduce PMs or export data to CSV.")
+            if job.status == "done":
+                result_cache.put(job_key, job.result)
+            st.session_state["result"] = {"key": job_key, "value": job.result, "status": job.status,
+                                          "history": progress["history"]}
+
+result = st.session_state.get("result")
+if result is not None and result["key"] == key:
+    best_solution, best_cost, island_stats, stop_summary, profile, plan = result["value"]
+    total, pm_power, pm_usage, utilization = instance.report(best_solution, P_idle, P_busy)
+    unplaced = repair_solution(best_solution.copy(), vm_cpu, pm_cpu, repair_policy)[1]
 
-        if num_pms <= 300:
-            st.subheader("📈 PM Utilization vs Power Graph")
-            fig, ax1 = plt.subplots(figsize=(10, 5))
-            pm_ids = [pm["id"] for pm in PMs]
-            util_percent = [(pm_usage[i] / PMs[i]["cpu"]) * 100 if PMs[i]["cpu"] != 0 else 0 for i in range(len(PMs))]
+    if result["status"] == "cancelled":
+        st.warning("⏹️ Optimization cancelled - showing the best solution found so far.")
+    elif result["status"] == "cached":
+        st.info("♻️ Same instance and parameters as an earlier run - showing the cached result.")
+    else:
+        st.success("✅ Optimization Complete")
+    if unplaced:
+        st.error(f"❌ {len(unplaced)} VM(s) could not be placed within PM capacity: "
+                 + ", ".join(instance.vm_ids[vm_idx] for vm_idx in unplaced[:20])
+                 + (" ..." if len(unplaced) > 20 else ""))
+    st.markdown(f"### ⚡ Total Power Consumption: **{round(total, 2)} W**")
+    bound = lower_bound(vm_cpu, pm_cpu, P_idle, P_busy)
+    st.caption(f"📐 Lower bound: {bound:.2f} W - optimality gap {optimality_gap(total, bound) * 100:.2f}%")
+    st.caption(f"🛑 Stopped by: {stop_summary['reason']} after {stop_summary['generations']} generations, "
+               f"{stop_summary['evaluations']} move evaluations, {stop_summary['elapsed']:.2f}s")
 
-            ax1.bar(pm_ids, util_percent, color='skyblue')
-            ax1.set_ylabel('Utilization (%)', color='blue')
-            ax1.set_ylim(0, 120)
+    if plan is not None:
+        temporary = sum(1 for vm_idx, _, pm_idx in plan if pm_idx != best_solution[vm_idx])
+        st.caption(f"🚚 {len(plan) - temporary} VM migration(s) in {len(plan)} step(s)"
+                   + (f", {temporary} through a temporary PM" if temporary else ""))
 
-            ax2 = ax1.twinx()
-            ax2.plot(pm_ids, pm_power, color='red', marker='o')
-            ax2.set_ylabel('Power (W)', color='red')
-            ax2.set_ylim(0, max(pm_power) + 50)
+    if result["history"]:
+        st.subheader("📉 Convergence")
+        st.line_chart(pd.DataFrame({"Best Power (W)": result["history"]}))
 
-            st.pyplot(fig)
-        else:
-            st.warning("📉 Too many PMs for graph! Graph limited to 300 PMs for clarity.")
+    if island_stats:
+        st.subheader("🏝️ Island Statistics")
+        st.dataframe(pd.DataFrame({
+            "Island": [s["island"] + 1 for s in island_stats],
+            "Fireflies": [s["fireflies"] for s in island_stats],
+            "Generations": [s["generations"] for s in island_stats],
+            "Best Power (W)": [round(s["best_cost"], 2) for s in island_stats],
+        }))
+
+    render_start = time.perf_counter()
+    result_key = (key, round(total, 6))
+    show_table("🧩 VM to PM Assignment", assignment_table(instance, best_solution), "vm_assignment", result_key)
+    show_table("📊 PM Utilization and Power", utilization_table(instance, best_solution, P_idle, P_busy),
+               "pm_utilization", result_key)
+    if plan:
+        show_table("🚚 Migration Plan (in order)", plan_table(instance, plan, best_solution), "migration_plan",
+                   result_key)
+
+    st.subheader("📈 PM Utilization vs Power Graph")
+    st.image(fleet_chart(result_key, instance.pm_ids, utilization, pm_power))
+
+    if st.button("♻️ Keep this placement for a warm start"):
+        st.session_state["warm_placement"] = instance.assignment(best_solution)
+        st.success("✅ Placement kept; tick 'Warm start from the kept placement' to re-optimize from it.")
+
+    if profile is not None:
+        # Optimizer counters/timers plus the time this rerun spent on tables and the graph
+        profile = dict(profile, render_seconds=round(time.perf_counter() - render_start, 6))
+        with st.expander("🔬 Profile"):
+            st.json(profile)
+            st.download_button("📥 Download Profile (JSON)", data=json.dumps(profile, indent=2),
+                               file_name="dfa_profile.json", mime="application/json")
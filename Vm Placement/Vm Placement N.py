@@ -1,5 +1,15 @@
+import argparse
+import sys
 import numpy as np
-import random
+from bounds import lower_bound, optimality_gap
+from consolidation import consolidate, count_migrations
+from instance import Instance
+from instrumentation import profiler
+from multi_resource_dfa import PlacementState, firefly_algorithm
+from island_dfa import island_firefly_algorithm
+from seeding import InfeasibleInstanceError
+from stopping import StoppingCriteria
+from warm_start import adapt_placement, load_placement
 
 # -------------------------------
 # Input Collection
@@ -21,134 +31,84 @@ def get_input_resources():
 
     return np.array(pm_caps), np.array(vm_reqs)
 
-# -------------------------------
-# Power Model
-# -------------------------------
-def power_consumption(cpu_used, ram_used, pm_cpu, pm_ram, pidle=162, pbusy=215):
-    if cpu_used == 0 and ram_used == 0:
-        return 0
-    usage = max(cpu_used / pm_cpu, ram_used / pm_ram)
-    return pidle + usage * (pbusy - pidle)
-
-# -------------------------------
-# Fitness: Total Power
-# -------------------------------
-def fitness(solution, vm_reqs, pm_caps):
-    usage = np.zeros_like(pm_caps)
-    for vm, pm in enumerate(solution):
-        usage[pm] += vm_reqs[vm]
-
-    total_power = 0
-    for i in range(len(pm_caps)):
-        total_power += power_consumption(usage[i][0], usage[i][1], pm_caps[i][0], pm_caps[i][1])
-    return total_power
-
-# -------------------------------
-# Feasibility
-# -------------------------------
-def is_feasible(solution, vm_reqs, pm_caps):
-    usage = np.zeros_like(pm_caps)
-    for vm, pm in enumerate(solution):
-        usage[pm] += vm_reqs[vm]
-    return np.all(usage <= pm_caps)
-
-# -------------------------------
-# Firefly Movement
-# -------------------------------
-def hamming_distance(a, b):
-    return np.sum(a != b)
-
-def move_firefly(fi, fj, vm_reqs, pm_caps, beta0=1.0, gamma=1.0):
-    new_fi = fi.copy()
-    dist = hamming_distance(fi, fj)
-    beta = beta0 * np.exp(-gamma * (dist ** 2))
-    for i in range(len(fi)):
-        if fi[i] != fj[i] and random.random() < beta:
-            new_fi[i] = fj[i]
-
-    # Mutation: change one VM's PM randomly (if it remains feasible)
-    if random.random() < 0.1:
-        idx = random.randint(0, len(fi) - 1)
-        original = new_fi[idx]
-        candidates = list(range(len(pm_caps)))
-        random.shuffle(candidates)
-        for pm in candidates:
-            new_fi[idx] = pm
-            if is_feasible(new_fi, vm_reqs, pm_caps):
-                break
-        else:
-            new_fi[idx] = original
-
-    if is_feasible(new_fi, vm_reqs, pm_caps):
-        return new_fi
-    else:
-        return fi
-
-# -------------------------------
-# Initialize Fireflies
-# -------------------------------
-def initialize_population(n_fireflies, num_vms, num_pms, vm_reqs, pm_caps):
-    population = []
-    for _ in range(n_fireflies):
-        while True:
-            sol = np.random.randint(0, num_pms, size=num_vms)
-            if is_feasible(sol, vm_reqs, pm_caps):
-                break
-        population.append(sol)
-    return np.array(population)
-
-# -------------------------------
-# Main DFA Algorithm
-# -------------------------------
-def firefly_algorithm(vm_reqs, pm_caps, n_fireflies=30, max_gen=100):
-    num_vms = len(vm_reqs)
-    num_pms = len(pm_caps)
-
-    fireflies = initialize_population(n_fireflies, num_vms, num_pms, vm_reqs, pm_caps)
-    fits = np.array([fitness(f, vm_reqs, pm_caps) for f in fireflies])
-    best = fireflies[np.argmin(fits)].copy()
-    best_fit = min(fits)
-
-    for gen in range(max_gen):
-        for i in range(n_fireflies):
-            for j in range(n_fireflies):
-                if fits[j] < fits[i]:
-                    new_sol = move_firefly(fireflies[i], fireflies[j], vm_reqs, pm_caps)
-                    new_fit = fitness(new_sol, vm_reqs, pm_caps)
-                    if new_fit < fits[i]:
-                        fireflies[i] = new_sol
-                        fits[i] = new_fit
-
-        current_best = fireflies[np.argmin(fits)]
-        current_fit = min(fits)
-        if current_fit < best_fit:
-            best = current_best.copy()
-            best_fit = current_fit
-
-    return best, best_fit
-
 # -------------------------------
 # Main
 # -------------------------------
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-resource VM placement with the Discrete Firefly Algorithm")
+    parser.add_argument("--islands", type=int, default=1, help="independent firefly sub-populations (1 = classic DFA)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for island mode (default: one per island)")
+    parser.add_argument("--stall", type=int, help="stop after this many generations without improvement")
+    parser.add_argument("--target-power", type=float, help="stop once total power is at most this many watts")
+    parser.add_argument("--time-limit", type=float, help="wall-clock deadline in seconds")
+    parser.add_argument("--max-evals", type=int, help="maximum number of move evaluations")
+    parser.add_argument("--gap", type=float, help="stop once the optimality gap is at most this fraction (e.g. 0.05)")
+    parser.add_argument("--seed", type=int, help="random seed; the same seed reproduces the same run")
+    parser.add_argument("--profile", metavar="PATH", help="write evaluation/move counters and hot-path timers as JSON")
+    parser.add_argument("--current", metavar="PATH",
+                        help="live placement (JSON {VM ID: PM ID} or assignment CSV) to consolidate with a migration plan")
+    parser.add_argument("--migration-cost", type=float, default=0.0, help="consolidation: watts charged per migrated VM")
+    parser.add_argument("--max-migrations", type=int, help="consolidation: hard limit on migration steps")
+    args = parser.parse_args()
+    profiler.enabled = args.profile is not None
+    stopping = StoppingCriteria(args.stall, args.target_power, args.time_limit, args.max_evals, args.gap)
+
     pm_caps, vm_reqs = get_input_resources()
-    best_sol, best_power = firefly_algorithm(vm_reqs, pm_caps, n_fireflies=40, max_gen=200)
+    instance = Instance(vm_reqs, pm_caps)
+    vm_reqs, pm_caps = instance.vm_reqs, instance.pm_caps
+    plan = None
+    try:
+        if args.current:
+            with open(args.current, encoding="utf-8") as f:
+                current, unplaced = adapt_placement(instance, load_placement(f.read()))
+            if unplaced:
+                print(f"\n{len(unplaced)} VM(s) of the current placement do not fit on any PM")
+                sys.exit(1)
+            best_sol, best_power, plan = consolidate(vm_reqs, pm_caps, current, args.migration_cost,
+                                                     args.max_migrations, n_fireflies=40, max_gen=200,
+                                                     stopping=stopping, seed=args.seed)
+        elif args.islands > 1:
+            best_sol, best_power, island_stats = island_firefly_algorithm(
+                vm_reqs, pm_caps, n_islands=args.islands, workers=args.workers, n_fireflies=40, max_gen=200, stopping=stopping,
+                seed=args.seed)
+            print("\nIsland Statistics:")
+            for stats in island_stats:
+                print(f"  Island {stats['island'] + 1}: Best Power = {stats['best_cost']:.2f}W")
+        else:
+            best_sol, best_power = firefly_algorithm(vm_reqs, pm_caps, n_fireflies=40, max_gen=200, stopping=stopping,
+                                                     seed=args.seed)
+    except InfeasibleInstanceError as e:
+        print(f"\n{e}")
+        sys.exit(1)
 
     print("\nFinal VM Placement:")
-    pm_usage = np.zeros_like(pm_caps)
+    state = PlacementState(best_sol, vm_reqs, pm_caps)
     pm_vms = [[] for _ in range(len(pm_caps))]
 
     for vm_idx, pm_idx in enumerate(best_sol):
-        pm_usage[pm_idx] += vm_reqs[vm_idx]
         pm_vms[pm_idx].append(vm_idx + 1)
 
     for i, vms in enumerate(pm_vms):
-        cpu, ram = pm_usage[i]
-        power = power_consumption(cpu, ram, pm_caps[i][0], pm_caps[i][1])
+        cpu, ram = state.usage[i]
+        power = state.pm_power[i]
         usage_percent = max(cpu / pm_caps[i][0], ram / pm_caps[i][1]) * 100
         if vms:
-            print(f"  PM{i+1}: VMs {vms} - Usage: CPU={cpu}, RAM={ram} ({usage_percent:.1f}%) - Power = {power:.2f}W")
+            print(f"  PM{i+1}: VMs {vms} - Usage: CPU={cpu:g}, RAM={ram:g} ({usage_percent:.1f}%) - Power = {power:.2f}W")
         else:
             print(f"  PM{i+1}: No VMs assigned - Power = 0.00W")
 
+    if plan is not None:
+        print(f"\nMigration Plan ({count_migrations(best_sol, current)} VMs moved, {len(plan)} steps):")
+        for step, (vm_idx, src, dst) in enumerate(plan, 1):
+            note = " (temporary)" if dst != best_sol[vm_idx] else ""
+            print(f"  {step}. {instance.vm_ids[vm_idx]}: {instance.pm_ids[src]} -> {instance.pm_ids[dst]}{note}")
+
     print(f"\nTotal Power Consumption: {best_power:.2f}W")
+    bound = lower_bound(vm_reqs, pm_caps)
+    print(f"Lower Bound: {bound:.2f}W (optimality gap {optimality_gap(best_power, bound) * 100:.2f}%)")
+    print(f"Stopped by: {stopping.reason} after {stopping.generations} generations, "
+          f"{stopping.evaluations} move evaluations, {stopping.elapsed():.2f}s")
+
+    if args.profile:
+        profiler.dump(args.profile)
+        print(f"Profile written to {args.profile}")
@@ -1,9 +1,14 @@
 import streamlit as st
 import random
-import numpy as np
-import matplotlib.pyplot as plt
-import csv
-import os
+import time
+from instance import Instance
+from dfa import optimize as run_dfa
+from capacity_index import repair_solution
+from bounds import lower_bound, optimality_gap
+from background_run import OptimizationJob
+from result_cache import instance_fingerprint
+from export import report_csv
+from charts import fleet_chart_png
 
 # Firefly parameters
 P_idle = 162
@@ -14,6 +19,11 @@ gamma = 1.0
 num_fireflies = 20
 iterations = 50
 
+@st.cache_data(max_entries=8)
+def fleet_chart(result_key, _pm_ids, _utilization, _pm_power):
+    return fleet_chart_png(_pm_ids, _utilization, _pm_power,
+                           title="PM Utilization and Power Consumption (Optimized by DFA)")
+
 # Input interface
 st.title("⚡ Power-aware VM Placement using Discrete Firefly Algorithm")
 
@@ -32,6 +42,9 @@ if input_mode == "Auto-generate":
         for i in range(num_pms):
             cpu = random.randint(30, 60)
             PMs.append({"id": f"PM{i+1}", "cpu": cpu})
+        st.session_state["generated"] = (VMs, PMs)
+    # Keep the generated data across reruns (progress updates, downloads, ...)
+    VMs, PMs = st.session_state.get("generated", ([], []))
 
 elif input_mode == "Manual":
     num_vms = st.number_input("Number of Virtual Machines (VMs)", 1, 100, 2)
@@ -44,144 +57,67 @@ elif input_mode == "Manual":
         cpu = st.number_input(f"CPU for PM{i+1}", 1, 100, 50, key=f"pm{i}")
         PMs.append({"id": f"PM{i+1}", "cpu": cpu})
 
-def power_consumption(assignments):
-    usage = [0] * len(PMs)
-    pm_power = [0] * len(PMs)
-
-    for vm_idx, pm_idx in enumerate(assignments):
-        usage[pm_idx] += VMs[vm_idx]["cpu"]
-
-    total_power = 0
-    for i, u in enumerate(usage):
-        if u > 0:
-            utilization = u / PMs[i]["cpu"]
-            power = P_idle + (P_busy - P_idle) * utilization
-            pm_power[i] = power
-            total_power += power
-    return total_power, pm_power, usage
-
-def generate_firefly():
-    firefly = []
-    pm_idx = 0
-    for vm_idx in range(len(VMs)):
-        firefly.append(pm_idx)
-        pm_idx = (pm_idx + 1) % len(PMs)
-    return firefly
-
-def move_firefly(f1, f2):
-    new_f = f1[:]
-    for i in range(len(VMs)):
-        if random.random() < beta0 * np.exp(-gamma * (f1[i] - f2[i]) ** 2):
-            new_f[i] = f2[i]
-        if random.random() < alpha:
-            new_f[i] = random.randint(0, len(PMs) - 1)
-    return repair_solution(new_f)
-
-def repair_solution(solution):
-    pm_resources = [pm["cpu"] for pm in PMs]
-    for vm_idx, pm_idx in enumerate(solution):
-        vm_cpu = VMs[vm_idx]["cpu"]
-        if vm_cpu > pm_resources[pm_idx]:
-            found = False
-            for new_pm_idx in range(len(PMs)):
-                if vm_cpu <= pm_resources[new_pm_idx]:
-                    solution[vm_idx] = new_pm_idx
-                    pm_resources[new_pm_idx] -= vm_cpu
-                    found = True
-                    break
-        else:
-            pm_resources[pm_idx] -= vm_cpu
-    return solution
-
-def optimize():
-    fireflies = [generate_firefly() for _ in range(num_fireflies)]
-    costs = [power_consumption(f)[0] for f in fireflies]
-
-    best_solution = fireflies[np.argmin(costs)]
-    best_cost = min(costs)
-
-    for _ in range(iterations):
-        for i in range(num_fireflies):
-            for j in range(num_fireflies):
-                if costs[j] < costs[i]:
-                    new_solution = move_firefly(fireflies[i], fireflies[j])
-                    new_cost = power_consumption(new_solution)[0]
-                    if new_cost < costs[i]:
-                        fireflies[i] = new_solution
-                        costs[i] = new_cost
-                        if new_cost < best_cost:
-                            best_solution = new_solution[:]
-                            best_cost = new_cost
-    return best_solution, best_cost
-
-if st.button("Run DFA Optimization"):
+instance = Instance.from_dicts(VMs, PMs)
+
+def optimize(progress=None, cancel=None):
+    return run_dfa(instance.vm_cpu, instance.pm_cpu, num_fireflies=num_fireflies, iterations=iterations,
+                   alpha=alpha, beta0=beta0, gamma=gamma, p_idle=P_idle, p_busy=P_busy,
+                   progress=progress, cancel=cancel)
+
+instance_key = instance_fingerprint(instance.vm_cpu, instance.pm_cpu)
+
+if st.button("Run DFA Optimization", disabled="job" in st.session_state):
     if not VMs or not PMs:
         st.warning("⚠️ Please provide VM and PM data first.")
     else:
-        solution, total = optimize()
-        total_power, pm_power, usage = power_consumption(solution)
-
-        st.subheader("✅ Best VM to PM Assignment")
-        for vm_idx, pm_idx in enumerate(solution):
-            st.write(f"{VMs[vm_idx]['id']} → {PMs[pm_idx]['id']}")
-
-        st.subheader("🔋 Power Consumption per PM")
-        for i in range(len(PMs)):
-            utilization = (usage[i] / PMs[i]["cpu"]) * 100 if PMs[i]["cpu"] != 0 else 0
-            st.write(f"{PMs[i]['id']}: Utilization = {utilization:.1f}%, Power = {pm_power[i]:.2f} W")
-
-        st.success(f"⚡ Minimum Total Power Consumption: {round(total_power, 2)} W")
-
-        # Save CSV
-        output_csv = "output_results.csv"
-        with open(output_csv, "w", newline="") as file:
-            writer = csv.writer(file)
-            writer.writerow(["=== VM Details ==="])
-            writer.writerow(["VM ID", "CPU"])
-            for vm in VMs:
-                writer.writerow([vm["id"], vm["cpu"]])
-            writer.writerow([])
-
-            writer.writerow(["=== PM Details ==="])
-            writer.writerow(["PM ID", "CPU"])
-            for pm in PMs:
-                writer.writerow([pm["id"], pm["cpu"]])
-            writer.writerow([])
-
-            writer.writerow(["=== VM Assignment ==="])
-            writer.writerow(["VM ID", "Assigned PM"])
-            for vm_idx, pm_idx in enumerate(solution):
-                writer.writerow([VMs[vm_idx]["id"], PMs[pm_idx]["id"]])
-            writer.writerow([])
-
-            writer.writerow(["=== PM Utilization and Power ==="])
-            writer.writerow(["PM ID", "Utilization (%)", "Power (W)"])
-            for i in range(len(PMs)):
-                utilization = (usage[i] / PMs[i]["cpu"]) * 100 if PMs[i]["cpu"] != 0 else 0
-                writer.writerow([PMs[i]["id"], f"{utilization:.1f}", f"{pm_power[i]:.2f}"])
-            writer.writerow([])
-            writer.writerow(["Total Power Consumption", round(total_power, 2)])
-
-        st.download_button("📥 Download CSV", data=open(output_csv, "rb"), file_name=output_csv)
-
-        # Save and show graph
-        pm_ids = [pm["id"] for pm in PMs]
-        utilization_percent = [(usage[i] / PMs[i]["cpu"]) * 100 if PMs[i]["cpu"] != 0 else 0 for i in range(len(PMs))]
-
-        fig, ax1 = plt.subplots(figsize=(10, 6))
-        bars = ax1.bar(pm_ids, utilization_percent, color='skyblue')
-        ax1.set_ylabel('Utilization (%)', color='blue')
-        ax1.set_ylim(0, 120)
-        ax1.set_title('PM Utilization and Power Consumption (Optimized by DFA)')
-        ax1.tick_params(axis='y', labelcolor='blue')
-
-        ax2 = ax1.twinx()
-        ax2.plot(pm_ids, pm_power, color='red', marker='o', linewidth=2)
-        ax2.set_ylabel('Power (W)', color='red')
-        ax2.set_ylim(0, max(pm_power) + 50 if pm_power else 100)
-        ax2.tick_params(axis='y', labelcolor='red')
-
-        plt.tight_layout()
-        plt.savefig("pm_utilization_graph.png")
-        st.image("pm_utilization_graph.png", caption="PM Utilization vs Power", use_column_width=True)
-        st.success("📊 Graph saved as: pm_utilization_graph.png")
+        st.session_state["job"] = (instance_key, OptimizationJob(optimize, iterations).start())
+        st.session_state.pop("result", None)
+
+if "job" in st.session_state:
+    job_key, job = st.session_state["job"]
+    progress = job.snapshot()
+    if job.running:
+        st.progress(progress["fraction"], text=f"⏳ Generation {progress['generation']}/{progress['total_generations']}")
+        if progress["history"]:
+            st.line_chart({"Best Power (W)": progress["history"]})
+        if st.button("⏹️ Cancel Optimization"):
+            job.cancel()
+        time.sleep(0.5)
+        st.rerun()
+    else:
+        del st.session_state["job"]
+        if job.status == "error":
+            st.error(f"❌ Optimization failed: {job.error}")
+        else:
+            st.session_state["result"] = (job_key, job.result, job.status)
+
+result = st.session_state.get("result")
+if result is not None and result[0] == instance_key:
+    (solution, total), status = result[1], result[2]
+    if status == "cancelled":
+        st.warning("⏹️ Optimization cancelled - showing the best solution found so far.")
+    total_power, pm_power, usage, utilization = instance.report(solution, P_idle, P_busy)
+    unplaced = repair_solution(solution.copy(), instance.vm_cpu, instance.pm_cpu)[1]
+    for vm_idx in unplaced:
+        st.warning(f"❌ {instance.vm_ids[vm_idx]} could not be placed within PM capacity!")
+
+    st.subheader("✅ Best VM to PM Assignment")
+    for vm_idx, pm_idx in enumerate(solution):
+        st.write(f"{instance.vm_ids[vm_idx]} → {instance.pm_ids[pm_idx]}")
+
+    st.subheader("🔋 Power Consumption per PM")
+    for i in range(instance.num_pms):
+        st.write(f"{instance.pm_ids[i]}: Utilization = {utilization[i]:.1f}%, Power = {pm_power[i]:.2f} W")
+
+    st.success(f"⚡ Minimum Total Power Consumption: {round(total_power, 2)} W")
+    bound = lower_bound(instance.vm_cpu, instance.pm_cpu, P_idle, P_busy)
+    st.info(f"📐 Lower Bound: {bound:.2f} W (optimality gap {optimality_gap(total_power, bound) * 100:.2f}%)")
+
+    # Results CSV built in memory, no temp file
+    st.download_button("📥 Download CSV", data=report_csv(instance, solution, P_idle, P_busy),
+                       file_name="output_results.csv", mime="text/csv")
+
+    # Rendered off-screen once per result, no PNG round trip through the disk
+    graph = fleet_chart((instance_key, round(total_power, 6)), instance.pm_ids, utilization, pm_power)
+    st.image(graph, caption="PM Utilization vs Power", use_column_width=True)
+    st.download_button("📥 Download Graph", data=graph, file_name="pm_utilization_graph.png", mime="image/png")
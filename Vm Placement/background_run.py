@@ -0,0 +1,75 @@
+import threading
+import time
+
+
+class OptimizationJob:
+    """Runs an optimizer in a background thread and records its progress.
+
+    target is called as target(progress=..., cancel=...) and must return the
+    final result; progress(generation, best_cost, best_solution) is fed by
+    the optimizer after every generation, and cancel is a threading.Event.
+    """
+
+    def __init__(self, target, total_generations):
+        self.target = target
+        self.total_generations = total_generations
+        self.cancel_event = threading.Event()
+        self.status = "pending"
+        self.generation = 0
+        self.history = []
+        self.best_cost = None
+        self.best_solution = None
+        self.result = None
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _progress(self, generation, best_cost, best_solution):
+        with self._lock:
+            self.generation = generation
+            self.best_cost = float(best_cost)
+            self.best_solution = best_solution.copy()
+            self.history.append(self.best_cost)
+
+    def _run(self):
+        try:
+            self.result = self.target(progress=self._progress, cancel=self.cancel_event)
+            self.status = "cancelled" if self.cancel_event.is_set() else "done"
+        except Exception as e:
+            self.error = e
+            self.status = "error"
+        finally:
+            self.finished_at = time.perf_counter()
+
+    def start(self):
+        self.status = "running"
+        self.started_at = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def join(self, timeout=None):
+        # Wait for the run to finish (or timeout seconds)
+        self._thread.join(timeout)
+
+    @property
+    def running(self):
+        return self.status == "running"
+
+    def snapshot(self):
+        # Consistent copy of the progress fields for rendering
+        with self._lock:
+            end = self.finished_at or time.perf_counter()
+            return {
+                "status": self.status,
+                "generation": self.generation,
+                "total_generations": self.total_generations,
+                "fraction": min(1.0, self.generation / self.total_generations) if self.total_generations else 1.0,
+                "history": list(self.history),
+                "best_cost": self.best_cost,
+                "elapsed": end - self.started_at if self.started_at else 0.0,
+            }
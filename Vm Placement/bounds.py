@@ -0,0 +1,81 @@
+import numpy as np
+from power_model import P_idle, P_busy
+
+# Lower bounds on total power for the linear model used throughout:
+#   power(PM) = P_idle + (P_busy - P_idle) * utilization   if the PM hosts anything, else 0
+# With several resources the utilization is the max over resources, so a
+# bound computed on any single resource is still a valid bound.
+
+
+def _columns(vm_demand, pm_capacity):
+    # (VMs x resources) and (PMs x resources) float arrays from 1-D or 2-D input
+    vm_demand = np.asarray(vm_demand, dtype=np.float64)
+    pm_capacity = np.asarray(pm_capacity, dtype=np.float64)
+    if vm_demand.ndim == 1:
+        vm_demand = vm_demand[:, np.newaxis]
+    if pm_capacity.ndim == 1:
+        pm_capacity = pm_capacity[:, np.newaxis]
+    return vm_demand, pm_capacity
+
+
+def _fill_largest(demand, capacity):
+    # Greedily pour demand into the largest PMs: (PMs needed, sum of load / capacity)
+    caps = np.sort(capacity[capacity > 0])[::-1]
+    if demand <= 0 or len(caps) == 0:
+        return 0, 0.0
+    filled = np.cumsum(caps)
+    full = int(np.searchsorted(filled, demand))  # PMs filled completely before the last one
+    if full >= len(caps):
+        return len(caps), float(len(caps))  # demand exceeds the fleet: every PM is full
+    rest = demand - (filled[full - 1] if full else 0.0)
+    return full + 1, float(full + rest / caps[full])
+
+
+def min_active_pms(vm_demand, pm_capacity):
+    """Fewest PMs that can host the demand, by total capacity and by large VMs.
+
+    Per resource: the largest PMs are needed to cover the total demand, and
+    VMs bigger than half the largest capacity cannot share a PM.
+    """
+    vm_demand, pm_capacity = _columns(vm_demand, pm_capacity)
+    if len(vm_demand) == 0:
+        return 0
+    best = 0
+    for r in range(vm_demand.shape[1]):
+        by_capacity = _fill_largest(vm_demand[:, r].sum(), pm_capacity[:, r])[0]
+        large = int((vm_demand[:, r] > pm_capacity[:, r].max(initial=0) / 2).sum())
+        best = max(best, by_capacity, min(large, len(pm_capacity)))
+    return best
+
+
+def capacity_bound(vm_demand, pm_capacity, p_idle=P_idle, p_busy=P_busy):
+    # Idle power of the fewest active PMs plus the smallest possible dynamic power
+    vm_demand, pm_capacity = _columns(vm_demand, pm_capacity)
+    dynamic = max((_fill_largest(vm_demand[:, r].sum(), pm_capacity[:, r])[1]
+                   for r in range(vm_demand.shape[1])), default=0.0)
+    return float(p_idle * min_active_pms(vm_demand, pm_capacity) + (p_busy - p_idle) * dynamic)
+
+
+def lp_bound(vm_demand, pm_capacity, p_idle=P_idle, p_busy=P_busy):
+    """LP relaxation with fractional on/off variables.
+
+    Relaxing "PM p is on" to y_p in [0, 1] with load_p <= cap_p * y_p makes
+    y_p = load_p / cap_p optimal, so every unit of load on p costs
+    P_busy / cap_p and the LP is solved by filling the largest PMs first.
+    """
+    vm_demand, pm_capacity = _columns(vm_demand, pm_capacity)
+    return float(p_busy * max((_fill_largest(vm_demand[:, r].sum(), pm_capacity[:, r])[1]
+                               for r in range(vm_demand.shape[1])), default=0.0))
+
+
+def lower_bound(vm_demand, pm_capacity, p_idle=P_idle, p_busy=P_busy):
+    return max(capacity_bound(vm_demand, pm_capacity, p_idle, p_busy),
+               lp_bound(vm_demand, pm_capacity, p_idle, p_busy))
+
+
+def optimality_gap(cost, bound):
+    # Relative gap (cost - bound) / cost; 0 means provably optimal. A negative
+    # gap means the cost is below the bound, i.e. some PM is over-committed.
+    if cost <= 0:
+        return 0.0
+    return (cost - bound) / cost
@@ -0,0 +1,198 @@
+from bisect import bisect_left, insort
+
+import numpy as np
+from instrumentation import profiler, timed
+
+POLICIES = ("first", "best", "worst")
+
+
+# -------------------------------
+# Residual Capacity Indexes
+# -------------------------------
+class MaxSegmentTree:
+    """Max segment tree over PM residual capacity (first-fit / worst-fit)."""
+
+    def __init__(self, residual):
+        n = len(residual)
+        size = 1
+        while size < n:
+            size *= 2
+        self.n = n
+        self.size = size
+        self.tree = [float("-inf")] * (2 * size)
+        self.tree[size:size + n] = [float(r) for r in residual]
+        for k in range(size - 1, 0, -1):
+            self.tree[k] = max(self.tree[2 * k], self.tree[2 * k + 1])
+
+    def value(self, pm):
+        return self.tree[self.size + pm]
+
+    def update(self, pm, residual):
+        tree = self.tree
+        k = self.size + pm
+        tree[k] = residual
+        k //= 2
+        while k:
+            best = max(tree[2 * k], tree[2 * k + 1])
+            if tree[k] == best:
+                break
+            tree[k] = best
+            k //= 2
+
+    def first_fit(self, demand):
+        # Leftmost PM whose residual capacity is >= demand
+        tree = self.tree
+        if tree[1] < demand:
+            return None
+        k = 1
+        while k < self.size:
+            k = 2 * k if tree[2 * k] >= demand else 2 * k + 1
+        return k - self.size
+
+    def worst_fit(self, demand):
+        # PM with the most residual capacity (leftmost on ties)
+        tree = self.tree
+        if tree[1] < demand:
+            return None
+        k = 1
+        while k < self.size:
+            k = 2 * k if tree[2 * k] == tree[k] else 2 * k + 1
+        return k - self.size
+
+
+class SortedResidual:
+    """Residual capacities kept sorted as (residual, pm) pairs (best-fit).
+
+    Pairs live in a list of sorted chunks so inserts and deletes shift a
+    short chunk instead of the whole fleet.
+    """
+
+    CHUNK = 512
+
+    def __init__(self, residual):
+        self.residual = [float(r) for r in residual]
+        keys = sorted((r, pm) for pm, r in enumerate(self.residual))
+        self.chunks = [keys[k:k + self.CHUNK] for k in range(0, len(keys), self.CHUNK)] or [[]]
+        self.maxes = [chunk[-1] for chunk in self.chunks if chunk]
+
+    def _locate(self, key):
+        # Chunk that holds (or would hold) key
+        return min(bisect_left(self.maxes, key), len(self.chunks) - 1)
+
+    def value(self, pm):
+        return self.residual[pm]
+
+    def update(self, pm, residual):
+        old = (self.residual[pm], pm)
+        c = self._locate(old)
+        chunk = self.chunks[c]
+        del chunk[bisect_left(chunk, old)]
+        if not chunk and len(self.chunks) > 1:
+            del self.chunks[c]
+            del self.maxes[c]
+        elif chunk:
+            self.maxes[c] = chunk[-1]
+        else:
+            self.maxes = []
+
+        self.residual[pm] = residual
+        new = (residual, pm)
+        c = self._locate(new)
+        chunk = self.chunks[c]
+        insort(chunk, new)
+        if c < len(self.maxes):
+            self.maxes[c] = chunk[-1]
+        else:
+            self.maxes.append(chunk[-1])
+        if len(chunk) > 2 * self.CHUNK:
+            self.chunks[c:c + 1] = [chunk[:self.CHUNK], chunk[self.CHUNK:]]
+            self.maxes[c:c + 1] = [chunk[self.CHUNK - 1], chunk[-1]]
+
+    def best_fit(self, demand):
+        # Tightest PM whose residual capacity is >= demand
+        key = (demand, -1)
+        c = bisect_left(self.maxes, key)
+        if c == len(self.maxes):
+            return None
+        chunk = self.chunks[c]
+        return chunk[bisect_left(chunk, key)][1]
+
+
+class CapacityIndex:
+    """Residual CPU per PM with O(log PMs) first-, best- and worst-fit lookups."""
+
+    def __init__(self, residual, policy="first"):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown fit policy '{policy}', expected one of {POLICIES}")
+        self.policy = policy
+        if policy == "best":
+            self.index = SortedResidual(residual)
+            self._find = self.index.best_fit
+        else:
+            self.index = MaxSegmentTree(residual)
+            self._find = self.index.first_fit if policy == "first" else self.index.worst_fit
+
+    def residual(self, pm):
+        return self.index.value(pm)
+
+    def find(self, demand):
+        return self._find(demand)
+
+    def allocate(self, pm, demand):
+        self.index.update(pm, self.index.value(pm) - demand)
+
+    def release(self, pm, demand):
+        self.index.update(pm, self.index.value(pm) + demand)
+
+    def place(self, demand):
+        # Find a host for demand and reserve it; None if nothing fits
+        pm = self._find(demand)
+        if pm is not None:
+            self.allocate(pm, demand)
+        return pm
+
+
+# -------------------------------
+# Repair
+# -------------------------------
+@timed("repair_solution")
+def repair_solution(solution, vm_cpu, pm_cpu, policy="first"):
+    """Make solution fit PM capacity in place; returns (solution, unplaced VM indices).
+
+    VMs that fit on their current PM (visited in index order) stay put; the
+    rest are re-homed with the chosen fit policy. VMs that fit nowhere are
+    left on their PM and reported as unplaced.
+    """
+    residual = [float(c) for c in pm_cpu]
+    overflow = []
+    for vm_idx, pm_idx in enumerate(solution.tolist() if hasattr(solution, "tolist") else solution):
+        vm_cpu_i = vm_cpu[vm_idx]
+        if vm_cpu_i > residual[pm_idx]:
+            overflow.append(vm_idx)
+        else:
+            residual[pm_idx] -= vm_cpu_i
+
+    profiler.count("repair_calls")
+    unplaced = []
+    if overflow:
+        index = CapacityIndex(residual, policy)
+        for vm_idx in overflow:
+            pm_idx = index.place(float(vm_cpu[vm_idx]))
+            if pm_idx is None:
+                unplaced.append(vm_idx)
+            else:
+                solution[vm_idx] = pm_idx
+        profiler.count("repair_relocated", len(overflow) - len(unplaced))
+    return solution, unplaced
+
+
+def pick_host(residual, demand, policy="first"):
+    # One-off lookup over a residual array, for callers without a live index
+    fits = residual >= demand
+    if not fits.any():
+        return None
+    if policy == "first":
+        return int(np.argmax(fits))
+    if policy == "worst":
+        return int(np.argmax(residual))
+    return int(np.argmin(np.where(fits, residual, np.inf)))
@@ -0,0 +1,123 @@
+import io
+
+import numpy as np
+from matplotlib.figure import Figure
+
+# Up to this many PMs the chart keeps one bar per PM; larger fleets are aggregated
+DETAIL_LIMIT = 300
+UTILIZATION_BINS = np.linspace(0, 100, 11)
+CURVE_POINTS = 500
+
+
+# -------------------------------
+# Aggregation
+# -------------------------------
+def _active(utilization, pm_power):
+    # Only PMs that are switched on (idle PMs draw no power and would swamp the 0% bucket)
+    utilization = np.asarray(utilization, dtype=np.float64)
+    pm_power = np.asarray(pm_power, dtype=np.float64)
+    on = pm_power > 0
+    return utilization[on], pm_power[on]
+
+
+def utilization_histogram(utilization, bins=UTILIZATION_BINS):
+    # PMs per utilization bucket; over-committed PMs (> 100%) land in the last bucket
+    counts, edges = np.histogram(np.clip(utilization, bins[0], bins[-1]), bins=bins)
+    return counts, edges
+
+
+def power_by_bucket(utilization, pm_power, bins=UTILIZATION_BINS):
+    # Total power drawn by the PMs of each utilization bucket
+    bucket = np.clip(np.digitize(utilization, bins[1:-1]), 0, len(bins) - 2)
+    return np.bincount(bucket, weights=pm_power, minlength=len(bins) - 1)
+
+
+def sorted_curve(values, points=CURVE_POINTS):
+    """Values sorted high to low, downsampled to about points samples.
+
+    Returns (rank, value) with the first and last ranks always included, so
+    the curve keeps its true extremes.
+    """
+    values = np.sort(np.asarray(values, dtype=np.float64))[::-1]
+    if len(values) <= points:
+        return np.arange(len(values)), values
+    rank = np.unique(np.linspace(0, len(values) - 1, points).round().astype(np.int64))
+    return rank, values[rank]
+
+
+# -------------------------------
+# Rendering
+# -------------------------------
+def _png(fig):
+    # Off-screen render to memory: no pyplot state, no file on disk
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=100)
+    return buffer.getvalue()
+
+
+def _detail_chart(pm_ids, utilization, pm_power, title):
+    fig = Figure(figsize=(10, 5), layout="tight")
+    ax1 = fig.add_subplot()
+    ax1.bar(pm_ids, utilization, color='skyblue')
+    ax1.set_ylabel('Utilization (%)', color='blue')
+    ax1.set_ylim(0, 120)
+    ax1.tick_params(axis='y', labelcolor='blue')
+    if len(pm_ids) > 30:
+        ax1.set_xticks([])
+        ax1.set_xlabel(f"{len(pm_ids)} PMs")
+    if title:
+        ax1.set_title(title)
+
+    ax2 = ax1.twinx()
+    ax2.plot(pm_ids, pm_power, color='red', marker='o' if len(pm_ids) <= 60 else None)
+    ax2.set_ylabel('Power (W)', color='red')
+    ax2.set_ylim(0, float(np.max(pm_power, initial=0)) + 50)
+    ax2.tick_params(axis='y', labelcolor='red')
+    return fig
+
+
+def _fleet_chart(utilization, pm_power, title):
+    total = len(utilization)
+    utilization, pm_power = _active(utilization, pm_power)
+    fig = Figure(figsize=(12, 4), layout="tight")
+    hist_ax, power_ax, curve_ax = fig.subplots(1, 3)
+    if title:
+        fig.suptitle(f"{title} - {len(utilization)} of {total} PMs active")
+
+    counts, edges = utilization_histogram(utilization)
+    labels = [f"{int(lo)}-{int(hi)}" for lo, hi in zip(edges[:-1], edges[1:])]
+    hist_ax.bar(labels, counts, color='skyblue')
+    hist_ax.set_title("Active PMs by utilization")
+    hist_ax.set_xlabel("Utilization (%)")
+    hist_ax.tick_params(axis='x', labelrotation=45)
+
+    power_ax.bar(labels, power_by_bucket(utilization, pm_power, edges) / 1000, color='salmon')
+    power_ax.set_title("Power by utilization bucket")
+    power_ax.set_xlabel("Utilization (%)")
+    power_ax.set_ylabel("Power (kW)")
+    power_ax.tick_params(axis='x', labelrotation=45)
+
+    rank, values = sorted_curve(utilization)
+    curve_ax.plot(rank, values, color='blue', label="Utilization (%)")
+    curve_ax.set_ylim(0, 120)
+    curve_ax.set_title("Sorted PM curves")
+    curve_ax.set_xlabel("PM rank")
+    power_curve = curve_ax.twinx()
+    rank, values = sorted_curve(pm_power)
+    power_curve.plot(rank, values, color='red', label="Power (W)")
+    power_curve.set_ylim(0, float(np.max(values, initial=0)) + 50)
+    curve_ax.set_ylabel("Utilization (%)", color='blue')
+    power_curve.set_ylabel("Power (W)", color='red')
+    return fig
+
+
+def fleet_chart_png(pm_ids, utilization, pm_power, title=None, detail_limit=DETAIL_LIMIT):
+    """PNG bytes of the utilization / power chart.
+
+    Fleets up to detail_limit PMs get one bar per PM with the power line;
+    larger ones get a utilization histogram, power per utilization bucket and
+    downsampled sorted curves, so the cost no longer grows with the PM count.
+    """
+    if len(pm_ids) <= detail_limit:
+        return _png(_detail_chart(list(pm_ids), utilization, pm_power, title))
+    return _png(_fleet_chart(utilization, pm_power, title))
@@ -0,0 +1,243 @@
+from collections import defaultdict, deque
+from functools import partial
+
+import numpy as np
+from bounds import lower_bound
+from instance import POP_DTYPE
+from multi_resource_dfa import FitnessCache, PlacementState, evolve, warm_fireflies, warm_usable
+from random_streams import seed_sequence
+
+
+# -------------------------------
+# Migration-Aware Objective
+# -------------------------------
+def count_migrations(solution, current):
+    return int(np.count_nonzero(np.asarray(solution) != np.asarray(current)))
+
+
+class MigrationState(PlacementState):
+    """PlacementState that also counts the VMs moved away from current.
+
+    objective() is total power + migration_cost per migrated VM, plus
+    penalty per migration over max_migrations. With penalty above the power
+    of the current placement, no over-budget firefly can beat current.
+    """
+
+    def __init__(self, solution, vm_reqs, pm_caps, current=None, migration_cost=0.0, max_migrations=None,
+                 penalty=0.0, cache=None):
+        self.current = current
+        self.migration_cost = migration_cost
+        self.max_migrations = max_migrations
+        self.penalty = penalty
+        self.migrations = count_migrations(solution, current)
+        super().__init__(solution, vm_reqs, pm_caps, cache)
+
+    def _move(self, vm, pm):
+        old = super()._move(vm, pm)
+        home = self.current[vm]
+        self.migrations += int(pm != home) - int(old != home)
+        return old
+
+    def objective(self):
+        cost = self.total_power + self.migration_cost * self.migrations
+        if self.max_migrations is not None and self.migrations > self.max_migrations:
+            cost += self.penalty * (self.migrations - self.max_migrations)
+        return cost
+
+
+# -------------------------------
+# Greedy Draining
+# -------------------------------
+def drain(current, vm_reqs, pm_caps, migration_cost=0.0, max_migrations=None):
+    """Empty lightly loaded PMs into the other active PMs, one PM at a time.
+
+    PMs are tried from the least loaded up; a PM is drained only if all its
+    VMs fit elsewhere (largest first, best fit), the budget allows the moves
+    and the power saved beats their migration cost. VMs only leave drained
+    PMs, so the moves never wait on each other.
+    """
+    state = PlacementState(np.array(current, dtype=POP_DTYPE), vm_reqs, pm_caps)
+    hosts = [[] for _ in range(len(pm_caps))]
+    for vm, pm in enumerate(state.solution.tolist()):
+        hosts[pm].append(vm)
+    load = (state.usage / pm_caps).max(axis=1)
+    active = state.usage.any(axis=1)
+    budget = len(vm_reqs) if max_migrations is None else max_migrations
+    received = np.zeros(len(pm_caps), dtype=bool)
+
+    for pm in np.argsort(load, kind="stable").tolist():
+        if not active[pm] or received[pm] or len(hosts[pm]) > budget:
+            continue
+        mark = state.checkpoint()
+        before = state.total_power
+        receivers = active.copy()
+        receivers[pm] = False
+        moved = True
+        for vm in sorted(hosts[pm], key=lambda v: -(vm_reqs[v] / pm_caps.max(axis=0)).sum()):
+            fits = np.flatnonzero(receivers & ((state.usage + vm_reqs[vm]) <= pm_caps).all(axis=1))
+            if len(fits) == 0:
+                moved = False
+                break
+            left = ((pm_caps[fits] - state.usage[fits] - vm_reqs[vm]) / pm_caps[fits]).max(axis=1)
+            state.move(vm, int(fits[np.argmin(left)]))
+        if moved and before - state.total_power > migration_cost * len(hosts[pm]):
+            received[[int(state.solution[vm]) for vm, _ in state.journal]] = True
+            state.commit()
+            active[pm] = False
+            budget -= len(hosts[pm])
+        else:
+            state.rollback(mark)
+    return state.solution
+
+
+def trim_migrations(solution, current, vm_reqs, pm_caps, migration_cost=0.0):
+    # Send migrated VMs back home wherever that costs at most migration_cost in power
+    state = PlacementState(np.array(solution, dtype=POP_DTYPE), vm_reqs, pm_caps)
+    for vm in np.flatnonzero(state.solution != current).tolist():
+        home = int(current[vm])
+        if not state.fits(vm, home):
+            continue
+        before = state.total_power
+        state.move(vm, home)
+        if state.total_power - before > migration_cost + 1e-9:
+            state.rollback()
+        else:
+            state.commit()
+    return state.solution
+
+
+# -------------------------------
+# Migration Plan
+# -------------------------------
+def migration_plan(current, target, vm_reqs, pm_caps):
+    """Ordered [(vm, from_pm, to_pm)] steps turning current into target.
+
+    No PM exceeds its capacity after any step: a move waits until its
+    target PM has room, and each move wakes the moves waiting on the PM it
+    leaves. Moves that wait on each other in a cycle are broken by parking
+    one VM on the PM with the most room (one extra step, to_pm differs from
+    target). Raises ValueError if target over-commits a PM or no VM can be
+    parked.
+    """
+    vm_reqs = np.asarray(vm_reqs, dtype=np.float64).reshape(len(current), -1)
+    pm_caps = np.asarray(pm_caps, dtype=np.float64).reshape(-1, vm_reqs.shape[1])
+    current = np.asarray(current, dtype=np.int64)
+    target = np.asarray(target, dtype=np.int64)
+    final = np.zeros_like(pm_caps)
+    np.add.at(final, target, vm_reqs)
+    if np.any(final > pm_caps + 1e-9):
+        raise ValueError("target placement over-commits a PM")
+
+    usage = np.zeros_like(pm_caps)
+    np.add.at(usage, current, vm_reqs)
+    location = current.copy()
+    pending = set(np.flatnonzero(current != target).tolist())
+    waiting = defaultdict(list)  # PM -> VMs waiting for room on it
+    ready = deque(sorted(pending))
+    parks_left = len(pending)  # parking steps allowed before giving up
+    last_parked = None
+    plan = []
+
+    def room(pm, vm):
+        return bool(np.all(usage[pm] + vm_reqs[vm] <= pm_caps[pm] + 1e-9))
+
+    def step(vm, pm):
+        src = int(location[vm])
+        usage[src] -= vm_reqs[vm]
+        usage[pm] += vm_reqs[vm]
+        location[vm] = pm
+        plan.append((vm, src, pm))
+        ready.extend(waiting.pop(src, ()))
+
+    while pending:
+        while ready:
+            vm = ready.popleft()
+            if vm not in pending:
+                continue
+            dst = int(target[vm])
+            if room(dst, vm):
+                pending.discard(vm)
+                step(vm, dst)
+            else:
+                waiting[dst].append(vm)
+        if not pending:
+            break
+
+        # Every remaining move waits on another: park a VM whose departure lets a waiter in
+        waited_on = np.zeros(len(pm_caps), dtype=bool)
+        waited_on[list(waiting)] = True
+        spare = ((pm_caps - usage) / pm_caps).min(axis=1)
+        best = None
+        for vm in sorted(pending - {last_parked}, key=lambda v: vm_reqs[v].sum()):
+            src = int(location[vm])
+            hosts = np.flatnonzero(((usage + vm_reqs[vm]) <= pm_caps + 1e-9).all(axis=1))
+            hosts = hosts[hosts != src]
+            if len(hosts) == 0:
+                continue
+            free = hosts[~waited_on[hosts]]
+            hosts = free if len(free) else hosts
+            host = int(hosts[np.argmax(spare[hosts])])
+            unblocks = any(np.all(usage[src] - vm_reqs[vm] + vm_reqs[w] <= pm_caps[src] + 1e-9)
+                           for w in waiting.get(src, ()))
+            if unblocks:
+                best = (vm, host)
+                break
+            if best is None:
+                best = (vm, host)
+        if best is None or parks_left == 0:
+            raise ValueError("no capacity-safe migration order: the waiting VMs have no PM to park on")
+        vm, host = best
+        parks_left -= 1
+        last_parked = vm
+        step(vm, host)
+    return plan
+
+
+# -------------------------------
+# Consolidation
+# -------------------------------
+def consolidate(vm_reqs, pm_caps, current, migration_cost=0.0, max_migrations=None, n_fireflies=20, max_gen=50,
+                stopping=None, seed=None, progress=None, cancel=None):
+    """Re-optimize a live placement for power plus migration cost.
+
+    current is the PM index of every VM and must fit (see
+    warm_start.adapt_placement). migration_cost is charged in watts per
+    migrated VM; max_migrations caps the steps of the final plan. The swarm
+    starts from current, its greedy drain and perturbations of current.
+    Returns (target, total_power, plan) with plan from migration_plan.
+    """
+    vm_reqs = np.asarray(vm_reqs)
+    pm_caps = np.asarray(pm_caps)
+    current = np.asarray(current, dtype=POP_DTYPE)
+    if not warm_usable(current, vm_reqs, pm_caps):
+        raise ValueError("current placement must place every VM without over-committing a PM")
+    if stopping is not None:
+        stopping.start()
+        if stopping.needs_bound():
+            stopping.lower_bound = lower_bound(vm_reqs, pm_caps)
+
+    drained = drain(current, vm_reqs, pm_caps, migration_cost, max_migrations)
+    population_seed, swarm_seed = seed_sequence(seed).spawn(2)
+    n_fireflies = max(2, n_fireflies)
+    current_seed, drained_seed = population_seed.spawn(2)
+    fireflies = np.concatenate([
+        warm_fireflies(current, n_fireflies // 2, vm_reqs, pm_caps, seed=current_seed),
+        warm_fireflies(drained, n_fireflies - n_fireflies // 2, vm_reqs, pm_caps, seed=drained_seed)])
+    make_state = partial(MigrationState, current=current, migration_cost=migration_cost,
+                         max_migrations=max_migrations,
+                         penalty=PlacementState(current.copy(), vm_reqs, pm_caps).total_power + 1.0)
+    fits = np.zeros(len(fireflies), dtype=np.float64)
+    # Perturbations that moved nothing duplicate current; those start from the cache
+    best, _ = evolve(fireflies, fits, vm_reqs, pm_caps, max_gen, stopping, swarm_seed, FitnessCache(), make_state,
+                     progress=progress, cancel=cancel)
+    best = trim_migrations(best, current, vm_reqs, pm_caps, migration_cost)
+
+    try:
+        plan = migration_plan(current, best, vm_reqs, pm_caps)
+    except ValueError:
+        plan = None
+    if plan is None or (max_migrations is not None and len(plan) > max_migrations):
+        # No safe order within budget: fall back to the drain, whose moves never wait on each other
+        best = drained
+        plan = migration_plan(current, best, vm_reqs, pm_caps)
+    return best, PlacementState(best.copy(), vm_reqs, pm_caps).total_power, plan
@@ -0,0 +1,222 @@
+import numpy as np
+from bounds import lower_bound
+from capacity_index import pick_host, repair_solution
+from instance import POP_DTYPE
+from instrumentation import profiler, timed
+from power_model import P_idle, P_busy, batch_power_consumption
+from random_streams import generator, seed_sequence, spawn_streams
+from warm_start import warm_population
+
+# -------------------------------
+# DFA Parameters
+# -------------------------------
+alpha = 0.2  # Randomization factor
+beta0 = 1.0  # Attractiveness
+gamma = 1.0  # Absorption coefficient
+num_fireflies = 20  # Firefly population
+iterations = 50  # Number of iterations
+
+
+# -------------------------------
+# Helpers
+# -------------------------------
+def pm_power(usage, pm_cpu, p_idle=P_idle, p_busy=P_busy):
+    return np.where(usage > 0, p_idle + (p_busy - p_idle) * (usage / pm_cpu), 0.0)
+
+
+def generate_firefly(num_vms, num_pms):
+    # Distribute VMs evenly across PMs (round-robin)
+    return (np.arange(num_vms) % num_pms).astype(POP_DTYPE)
+
+
+def initial_population(vm_cpu, pm_cpu, n_fireflies, repair_policy="first", seed=None):
+    # Firefly 0 is the classic round-robin seed, the rest are random so the
+    # swarm has brightness differences to follow from the first generation
+    num_vms, num_pms = len(vm_cpu), len(pm_cpu)
+    population = generator(seed).integers(0, num_pms, size=(n_fireflies, num_vms), dtype=POP_DTYPE)
+    population[0] = generate_firefly(num_vms, num_pms)
+    for row in population:
+        repair_solution(row, vm_cpu, pm_cpu, repair_policy)
+    return population
+
+
+def warm_initial_population(initial, vm_cpu, pm_cpu, n_fireflies, repair_policy="first", seed=None):
+    # Warm start: the previous best placement plus repaired perturbations of it
+    population = warm_population(initial, n_fireflies, len(pm_cpu), seed=seed)
+    for row in population:
+        repair_solution(row, vm_cpu, pm_cpu, repair_policy)
+    return population
+
+
+# -------------------------------
+# Incremental Firefly Swarm
+# -------------------------------
+class FireflySwarm:
+    """Fireflies with live per-PM usage, so a move is scored from the VMs it changes.
+
+    Firefly i moves with its own random stream rngs[i], spawned from seed.
+    """
+
+    def __init__(self, fireflies, vm_cpu, pm_cpu, p_idle=P_idle, p_busy=P_busy, repair_policy="first", seed=None):
+        self.vm_cpu = np.asarray(vm_cpu, dtype=np.float64)
+        self.pm_cpu = np.asarray(pm_cpu, dtype=np.float64)
+        self.p_idle = p_idle
+        self.p_busy = p_busy
+        self.repair_policy = repair_policy
+        self.positions = np.array(fireflies, dtype=POP_DTYPE)
+        costs, _, usage = batch_power_consumption(self.positions, self.vm_cpu, self.pm_cpu, p_idle, p_busy)
+        self.costs = costs
+        self.usage = usage
+        self.rngs = spawn_streams(seed, len(self.positions))
+
+    @timed("move_firefly")
+    def propose(self, i, j, alpha=alpha, beta0=beta0, gamma=gamma):
+        # Returns a move (vms, new_pms, pms, new_usage, cost); firefly i is untouched
+        rng = self.rngs[i]
+        fi = self.positions[i]
+        fj = self.positions[j]
+        num_vms = len(fi)
+        new_f = fi.copy()
+        # Attraction only matters where the fireflies differ
+        differ = np.flatnonzero(fi != fj)
+        pull = fj[differ] - fi[differ]
+        attract = rng.random(len(differ)) < beta0 * np.exp(-gamma * pull.astype(np.float64) ** 2)
+        new_f[differ[attract]] = fj[differ[attract]]
+        # Mutation: each VM with probability alpha, drawn as a count plus distinct positions
+        mutate = rng.choice(num_vms, size=rng.binomial(num_vms, alpha), replace=False)
+        new_f[mutate] = rng.integers(0, len(self.pm_cpu), size=len(mutate), dtype=POP_DTYPE)
+        vms = np.flatnonzero(new_f != fi)
+        return self.evaluate_move(i, vms, new_f[vms])
+
+    def evaluate_move(self, i, vms, new_pms):
+        profiler.count("fitness_evaluations")
+        old_pms = self.positions[i, vms]
+        cpu = self.vm_cpu[vms]
+        pms = np.unique(np.concatenate([old_pms, new_pms]))
+        new_usage = self.usage[i, pms].copy()
+        np.subtract.at(new_usage, np.searchsorted(pms, old_pms), cpu)
+        np.add.at(new_usage, np.searchsorted(pms, new_pms), cpu)
+
+        if np.any(new_usage > self.pm_cpu[pms]):
+            residual = self.pm_cpu - self.usage[i]
+            residual[pms] = self.pm_cpu[pms] - new_usage
+            new_pms = self._repair_move(vms, old_pms, new_pms, residual)
+            pms = np.unique(np.concatenate([old_pms, new_pms]))
+            new_usage = self.pm_cpu[pms] - residual[pms]
+
+        old_power = pm_power(self.usage[i, pms], self.pm_cpu[pms], self.p_idle, self.p_busy).sum()
+        new_power = pm_power(new_usage, self.pm_cpu[pms], self.p_idle, self.p_busy).sum()
+        return vms, new_pms, pms, new_usage, self.costs[i] + (new_power - old_power)
+
+    @timed("repair_move")
+    def _repair_move(self, vms, old_pms, new_pms, residual):
+        # Move changed VMs off overloaded PMs: back home if it fits, else by fit policy.
+        # Each lookup is a NumPy scan of residual (O(PMs) in C) rather than a
+        # per-firefly CapacityIndex: a move changes ~alpha of all VMs, so an
+        # index would need thousands of O(log PMs) Python updates per move to
+        # mirror it, which measured 4-8x slower than the scans (5k-20k VMs)
+        profiler.count("repair_calls")
+        new_pms = new_pms.copy()
+        for k in range(len(vms)):
+            pm = new_pms[k]
+            if residual[pm] >= 0:
+                continue
+            vm_cpu_k = self.vm_cpu[vms[k]]
+            residual[pm] += vm_cpu_k
+            home = old_pms[k]
+            if residual[home] >= vm_cpu_k:
+                target = home
+            else:
+                target = pick_host(residual, vm_cpu_k, self.repair_policy)
+                if target is None:
+                    residual[pm] -= vm_cpu_k  # stays over-committed, as in the full repair
+                    continue
+            new_pms[k] = target
+            residual[target] -= vm_cpu_k
+            profiler.count("repair_relocated")
+        return new_pms
+
+    def apply(self, i, move):
+        vms, new_pms, pms, new_usage, cost = move
+        self.positions[i, vms] = new_pms
+        self.usage[i, pms] = new_usage
+        self.costs[i] = cost
+
+
+# -------------------------------
+# Main DFA Loop
+# -------------------------------
+def evolve(swarm, iterations=iterations, alpha=alpha, beta0=beta0, gamma=gamma, progress=None, cancel=None,
+           stopping=None):
+    # Runs the DFA generations in place on swarm; returns the best firefly seen.
+    # progress(generation, best_cost, best_solution) is called after every
+    # generation; setting the cancel event stops early with the best so far.
+    # stopping (a StoppingCriteria) adds stall/target/deadline/evaluation
+    # limits and records which one ended the run in stopping.reason.
+    n_fireflies = len(swarm.positions)
+    best_idx = int(np.argmin(swarm.costs))
+    best_solution = swarm.positions[best_idx].copy()
+    best_cost = swarm.costs[best_idx]
+    if stopping is not None:
+        if stopping.started_at is None:
+            stopping.start()
+        if stopping.reached(best_cost) or stopping.exhausted():
+            return best_solution, best_cost
+
+    for gen in range(iterations):
+        if cancel is not None and cancel.is_set():
+            if stopping is not None:
+                stopping.finish("cancelled")
+            break
+        out_of_budget = False
+        for i in range(n_fireflies):
+            for j in range(n_fireflies):
+                if swarm.costs[j] < swarm.costs[i]:
+                    if stopping is not None:
+                        if stopping.exhausted():
+                            out_of_budget = True
+                            break
+                        stopping.count()
+                    move = swarm.propose(i, j, alpha, beta0, gamma)
+                    if move[4] < swarm.costs[i]:
+                        swarm.apply(i, move)
+                        profiler.count("moves_accepted")
+                        if move[4] < best_cost:
+                            best_solution = swarm.positions[i].copy()
+                            best_cost = move[4]
+                    else:
+                        profiler.count("moves_rejected")
+            if out_of_budget:
+                break
+        if progress is not None:
+            progress(gen + 1, best_cost, best_solution)
+        if out_of_budget or (stopping is not None and stopping.update(best_cost)):
+            break
+    if stopping is not None:
+        stopping.finish()
+    return best_solution, best_cost
+
+
+def optimize(vm_cpu, pm_cpu, num_fireflies=num_fireflies, iterations=iterations,
+             alpha=alpha, beta0=beta0, gamma=gamma, p_idle=P_idle, p_busy=P_busy, repair_policy="first",
+             progress=None, cancel=None, stopping=None, seed=None, initial=None):
+    # seed makes the run reproducible: it seeds the initial population and
+    # one move stream per firefly. initial (PM index per VM, e.g. from
+    # warm_start.adapt_placement) warm-starts the swarm from a previous placement
+    if stopping is not None:
+        stopping.start()  # the deadline covers building the initial population too
+    vm_cpu = np.asarray(vm_cpu, dtype=np.float64)
+    pm_cpu = np.asarray(pm_cpu, dtype=np.float64)
+    if stopping is not None and stopping.needs_bound():
+        stopping.lower_bound = lower_bound(vm_cpu, pm_cpu, p_idle, p_busy)
+    population_seed, swarm_seed = seed_sequence(seed).spawn(2)
+    if initial is None:
+        population = initial_population(vm_cpu, pm_cpu, num_fireflies, repair_policy, population_seed)
+    else:
+        population = warm_initial_population(initial, vm_cpu, pm_cpu, num_fireflies, repair_policy, population_seed)
+    swarm = FireflySwarm(population, vm_cpu, pm_cpu, p_idle, p_busy, repair_policy, swarm_seed)
+    best_solution, _ = evolve(swarm, iterations, alpha, beta0, gamma, progress, cancel, stopping)
+
+    # Re-score once from scratch so accumulated deltas never drift into the report
+    best_cost = float(batch_power_consumption(best_solution, vm_cpu, pm_cpu, p_idle, p_busy)[0][0])
+    return best_solution, best_cost
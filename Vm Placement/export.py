@@ -0,0 +1,132 @@
+import csv
+import importlib.util
+import io
+
+import numpy as np
+from power_model import P_idle, P_busy
+
+# Parquet export needs pyarrow; CSV works with the standard library alone
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+CHUNK_ROWS = 10000
+
+
+# -------------------------------
+# Result Tables
+# -------------------------------
+# A table is a dict of equal-length columns (lists or 1-D arrays), which
+# pandas, pyarrow and the CSV writer below all take without copying rows.
+def assignment_table(instance, solution):
+    solution = np.asarray(solution)
+    pm_ids = np.array(instance.pm_ids, dtype=object)
+    # Unplaced VMs (-1) get an empty cell
+    table = {"VM ID": instance.vm_ids, "Assigned PM": np.where(solution >= 0, pm_ids[solution], None)}
+    for r, resource in enumerate(instance.resources):
+        table[f"VM {resource.upper()}"] = instance.vm_demand[r]
+    return table
+
+
+def utilization_table(instance, solution, p_idle=P_idle, p_busy=P_busy):
+    _, pm_power, usage, utilization = instance.report(solution, p_idle, p_busy)
+    return {
+        "PM ID": instance.pm_ids,
+        "CPU Capacity": instance.pm_cpu,
+        "Used CPU": usage,
+        "Utilization (%)": np.round(utilization, 1),
+        "Power (W)": np.round(pm_power, 2),
+    }
+
+
+def plan_table(instance, plan, target):
+    # One row per migration step; parking hops (to a PM other than the VM's target) are flagged
+    return {
+        "Step": list(range(1, len(plan) + 1)),
+        "VM ID": [instance.vm_ids[vm] for vm, _, _ in plan],
+        "From PM": [instance.pm_ids[src] for _, src, _ in plan],
+        "To PM": [instance.pm_ids[dst] for _, _, dst in plan],
+        "Temporary": [bool(dst != target[vm]) for vm, _, dst in plan],
+    }
+
+
+def num_rows(table):
+    return len(next(iter(table.values()))) if table else 0
+
+
+def num_pages(table, page_size):
+    return max(1, -(-num_rows(table) // page_size))
+
+
+def page(table, number, page_size):
+    # Rows of 1-based page number as a smaller table
+    start = (number - 1) * page_size
+    return {name: column[start:start + page_size] for name, column in table.items()}
+
+
+# -------------------------------
+# CSV
+# -------------------------------
+def _cell(value):
+    # Whole floats as ints so capacities read "50", not "50.0"
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def iter_csv(table, chunk_rows=CHUNK_ROWS, header=True):
+    """Yield the table as CSV text, chunk_rows rows per piece.
+
+    Nothing touches the disk and only one chunk of text is held at a time.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(list(table))
+    for start in range(0, num_rows(table), chunk_rows):
+        columns = [np.asarray(column[start:start + chunk_rows], dtype=object).tolist() for column in table.values()]
+        writer.writerows([_cell(v) for v in row] for row in zip(*columns))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def csv_bytes(table, chunk_rows=CHUNK_ROWS):
+    return "".join(iter_csv(table, chunk_rows)).encode("utf-8")
+
+
+def report_csv(instance, solution, p_idle=P_idle, p_busy=P_busy):
+    # The sectioned results file (inputs, assignment, utilization, total) as bytes
+    total = instance.report(solution, p_idle, p_busy)[0]
+    sections = [
+        ("=== VM Details ===", {"VM ID": instance.vm_ids, "CPU": instance.vm_cpu}),
+        ("=== PM Details ===", {"PM ID": instance.pm_ids, "CPU": instance.pm_cpu}),
+        ("=== VM Assignment ===", {"VM ID": instance.vm_ids,
+                                   "Assigned PM": assignment_table(instance, solution)["Assigned PM"]}),
+        ("=== PM Utilization and Power ===", {name: column for name, column
+                                              in utilization_table(instance, solution, p_idle, p_busy).items()
+                                              if name in ("PM ID", "Utilization (%)", "Power (W)")}),
+    ]
+    parts = []
+    for title, table in sections:
+        parts.append(title + "\n")
+        parts.extend(iter_csv(table))
+        parts.append("\n")
+    parts.append(f"Total Power Consumption,{round(float(total), 2)}\n")
+    return "".join(parts).encode("utf-8")
+
+
+# -------------------------------
+# Parquet
+# -------------------------------
+def parquet_bytes(table, chunk_rows=CHUNK_ROWS * 10):
+    """The table as a Parquet file in memory, one row group per chunk_rows rows.
+
+    Raises ImportError when pyarrow is not installed (see PARQUET_AVAILABLE).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrow = pa.table({name: np.asarray(column) for name, column in table.items()})
+    sink = io.BytesIO()
+    pq.write_table(arrow, sink, row_group_size=chunk_rows)
+    return sink.getvalue()
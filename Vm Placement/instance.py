@@ -0,0 +1,90 @@
+import numpy as np
+from power_model import P_idle, P_busy, batch_power_consumption
+
+# Solutions and populations hold PM indices in this dtype: one row per firefly
+POP_DTYPE = np.int32
+
+
+class Instance:
+    """A placement instance as typed arrays instead of lists of dicts.
+
+    vm_demand and pm_capacity are float64 (resources x machines) arrays, one
+    contiguous row per resource (CPU first, then RAM if given). IDs are
+    mapped to indices once; solutions are POP_DTYPE arrays of PM indices.
+    """
+
+    def __init__(self, vm_demand, pm_capacity, vm_ids=None, pm_ids=None, resources=None):
+        vm_demand = np.asarray(vm_demand, dtype=np.float64)
+        pm_capacity = np.asarray(pm_capacity, dtype=np.float64)
+        # Accept one value per machine or (machines x resources) rows
+        vm_demand = vm_demand[np.newaxis, :] if vm_demand.ndim == 1 else vm_demand.T
+        pm_capacity = pm_capacity[np.newaxis, :] if pm_capacity.ndim == 1 else pm_capacity.T
+        if len(vm_demand) != len(pm_capacity):
+            raise ValueError(f"VMs have {len(vm_demand)} resources but PMs have {len(pm_capacity)}")
+        self.vm_demand = np.ascontiguousarray(vm_demand)
+        self.pm_capacity = np.ascontiguousarray(pm_capacity)
+        self.resources = tuple(resources or ("cpu", "ram")[:len(vm_demand)])
+
+        self.vm_ids = list(vm_ids) if vm_ids is not None else [f"VM{i+1}" for i in range(self.num_vms)]
+        self.pm_ids = list(pm_ids) if pm_ids is not None else [f"PM{i+1}" for i in range(self.num_pms)]
+        self.vm_index = {vm_id: i for i, vm_id in enumerate(self.vm_ids)}
+        self.pm_index = {pm_id: i for i, pm_id in enumerate(self.pm_ids)}
+
+    @classmethod
+    def from_dicts(cls, VMs, PMs, resources=("cpu",)):
+        # [{"id": "VM1", "cpu": 12}, ...] lists, as built by the input forms
+        def column(items, key):
+            return np.fromiter((item[key] for item in items), dtype=np.float64, count=len(items))
+        vm_demand = np.stack([column(VMs, r) for r in resources], axis=1) if VMs else np.zeros((0, len(resources)))
+        pm_capacity = np.stack([column(PMs, r) for r in resources], axis=1) if PMs else np.zeros((0, len(resources)))
+        return cls(vm_demand, pm_capacity,
+                   [vm.get("id", f"VM{i+1}") for i, vm in enumerate(VMs)],
+                   [pm.get("id", f"PM{i+1}") for i, pm in enumerate(PMs)], resources)
+
+    @property
+    def num_vms(self):
+        return self.vm_demand.shape[1]
+
+    @property
+    def num_pms(self):
+        return self.pm_capacity.shape[1]
+
+    @property
+    def vm_cpu(self):
+        return self.vm_demand[0]
+
+    @property
+    def pm_cpu(self):
+        return self.pm_capacity[0]
+
+    @property
+    def vm_reqs(self):
+        # (VMs x resources) view, as used by the multi-resource DFA
+        return self.vm_demand.T
+
+    @property
+    def pm_caps(self):
+        return self.pm_capacity.T
+
+    def empty_population(self, n_fireflies):
+        return np.zeros((n_fireflies, self.num_vms), dtype=POP_DTYPE)
+
+    def solution_from_ids(self, assignment):
+        # {vm_id: pm_id} -> PM index per VM; -1 where a VM is missing or its PM is unknown
+        solution = np.full(self.num_vms, -1, dtype=POP_DTYPE)
+        for vm_id, pm_id in assignment.items():
+            if vm_id in self.vm_index and pm_id in self.pm_index:
+                solution[self.vm_index[vm_id]] = self.pm_index[pm_id]
+        return solution
+
+    def assignment(self, solution):
+        # PM index per VM -> {vm_id: pm_id}, skipping unplaced (-1) VMs
+        return {self.vm_ids[vm]: self.pm_ids[pm] for vm, pm in enumerate(np.asarray(solution).tolist()) if pm >= 0}
+
+    def report(self, solution, p_idle=P_idle, p_busy=P_busy):
+        """CPU power report for one solution: (total_power, pm_power, usage, utilization %)."""
+        placed = np.asarray(solution) >= 0
+        total, pm_power, usage = batch_power_consumption(np.where(placed, solution, 0), self.vm_cpu * placed,
+                                                         self.pm_cpu, p_idle, p_busy)
+        utilization = np.divide(usage[0] * 100, self.pm_cpu, out=np.zeros(self.num_pms), where=self.pm_cpu != 0)
+        return float(total[0]), pm_power[0], usage[0], utilization
@@ -0,0 +1,66 @@
+import numpy as np
+
+from instance import Instance
+from packing import pack
+
+# Demand / capacity ranges used by the auto-generate forms (inclusive)
+VM_CPU = (5, 20)
+PM_CPU = (30, 60)
+VM_RAM = (1, 16)
+PM_RAM = (32, 128)
+
+# Packing shapes: target total demand / total capacity per resource
+SHAPES = {"tight": 0.9, "loose": 0.5}
+
+
+def _draw(rng, bounds, size):
+    return rng.integers(bounds[0], bounds[1] + 1, size=size).astype(np.float64)
+
+
+def _capacities_for(rng, demand, bounds, tightness):
+    # Draw PMs until they hold demand / tightness, so the fleet size follows the shape
+    target = demand.sum() / tightness
+    mean = (bounds[0] + bounds[1]) / 2
+    caps = _draw(rng, bounds, int(np.ceil(target / mean)) + 16)
+    while caps.sum() < target:
+        caps = np.concatenate([caps, _draw(rng, bounds, max(16, len(caps) // 10))])
+    return caps[:int(np.searchsorted(np.cumsum(caps), target)) + 1]
+
+
+def generate(num_vms, num_pms=None, resources=("cpu",), shape="loose", seed=None):
+    """Seeded synthetic instance.
+
+    resources is ("cpu",) or ("cpu", "ram"). With num_pms=None the fleet is
+    sized so total CPU demand / capacity matches SHAPES[shape] (a float is
+    taken as the ratio itself); otherwise num_pms PMs are drawn as-is.
+    """
+    rng = np.random.default_rng(seed)
+    tightness = SHAPES[shape] if isinstance(shape, str) else float(shape)
+    vm_cpu = _draw(rng, VM_CPU, num_vms)
+    pm_cpu = _draw(rng, PM_CPU, num_pms) if num_pms is not None else _capacities_for(rng, vm_cpu, PM_CPU, tightness)
+    vm_demand = [vm_cpu]
+    pm_capacity = [pm_cpu]
+    if "ram" in resources:
+        vm_ram = _draw(rng, VM_RAM, num_vms)
+        pm_ram = _draw(rng, PM_RAM, len(pm_cpu))
+        if num_pms is None:
+            # Scale RAM so it is packed about as tightly as CPU, then give every
+            # PM at least the RAM of the VMs an FFD packing puts on it: with
+            # independent CPU and RAM draws a tight fleet is otherwise often
+            # infeasible. RAM ends up somewhat looser than CPU (about 0.75 for "tight")
+            pm_ram = np.maximum(np.round(pm_ram * vm_ram.sum() / (tightness * pm_ram.sum())), VM_RAM[1])
+            planted = pack(vm_cpu, pm_cpu, "ffd")
+            placed = planted >= 0
+            pm_ram = np.maximum(pm_ram, np.bincount(planted[placed], weights=vm_ram[placed], minlength=len(pm_cpu)))
+        vm_demand.append(vm_ram)
+        pm_capacity.append(pm_ram)
+    return Instance(np.stack(vm_demand, axis=1), np.stack(pm_capacity, axis=1), resources=resources)
+
+
+def to_dicts(instance):
+    # Instance -> ([{"id": "VM1", "cpu": 12, ...}], [...]) for the dict-based forms and batch files
+    def rows(ids, values):
+        return [{"id": machine_id, **{r: int(v) if float(v).is_integer() else float(v)
+                                      for r, v in zip(instance.resources, row)}}
+                for machine_id, row in zip(ids, values.T.tolist())]
+    return rows(instance.vm_ids, instance.vm_demand), rows(instance.pm_ids, instance.pm_capacity)
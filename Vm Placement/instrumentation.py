@@ -0,0 +1,113 @@
+import functools
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+class Profiler:
+    """Named counters and cumulative timers for the optimizer hot paths.
+
+    Disabled by default: count() and the timed() wrappers then cost a single
+    attribute check, so instrumented code runs at full speed.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        self.counters = defaultdict(int)
+        self.timers = defaultdict(float)
+        self.calls = defaultdict(int)
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] += n
+
+    def add_time(self, name, seconds, calls=1):
+        self.timers[name] += seconds
+        self.calls[name] += calls
+
+    @contextmanager
+    def timer(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def snapshot(self):
+        return {
+            "counters": dict(self.counters),
+            "timers": {name: {"seconds": round(seconds, 6), "calls": self.calls[name],
+                              "mean_us": round(seconds / self.calls[name] * 1e6, 3) if self.calls[name] else 0.0}
+                       for name, seconds in self.timers.items()},
+        }
+
+    def merge(self, snapshot):
+        # Fold in a snapshot taken elsewhere (e.g. returned by a worker process)
+        for name, n in snapshot["counters"].items():
+            self.counters[name] += n
+        for name, timer in snapshot["timers"].items():
+            self.add_time(name, timer["seconds"], timer["calls"])
+
+    def dump(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+            f.write("\n")
+
+
+class _ActiveProfiler:
+    """The profiler of the current context, as seen by the solver modules.
+
+    Outside profiling() this is one process-wide Profiler; inside, each
+    block (and so each thread or background job running one) gets its own,
+    so concurrent runs never mix or reset each other's counters.
+    """
+
+    def __getattr__(self, name):
+        return getattr(_current.get(), name)
+
+    def __setattr__(self, name, value):
+        setattr(_current.get(), name, value)
+
+    def count(self, name, n=1):
+        _current.get().count(name, n)
+
+
+_current = ContextVar("profiler", default=Profiler())
+profiler = _ActiveProfiler()
+
+
+def timed(name):
+    # Decorator: accumulate the wrapped function's wall time under name
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profiler.add_time(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+@contextmanager
+def profiling(target=None):
+    # Profile a block into target (a fresh Profiler by default), visible only
+    # to code running in this context: with profiling() as prof: ...; prof.snapshot()
+    target = Profiler() if target is None else target
+    target.enabled = True
+    token = _current.set(target)
+    try:
+        yield target
+    finally:
+        _current.reset(token)
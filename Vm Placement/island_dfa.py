@@ -0,0 +1,203 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import dfa
+import multi_resource_dfa
+from bounds import lower_bound
+from instrumentation import profiler
+from power_model import P_idle, P_busy, batch_power_consumption
+from random_streams import seed_sequence
+
+# Instance data for the current process, set once per worker by _init_worker
+_instance = {}
+
+
+def _init_worker(instance):
+    _instance.clear()
+    _instance.update(instance)
+    if instance.get("worker_profile"):
+        profiler.enabled = True
+        profiler.reset()
+
+
+def _profile():
+    # Counters gathered in a worker process since the last epoch, for the driver to merge
+    if not _instance.get("worker_profile"):
+        return None
+    snapshot = profiler.snapshot()
+    profiler.reset()
+    return snapshot
+
+
+# -------------------------------
+# Island Epochs (run inside workers)
+# -------------------------------
+def _start(budget):
+    # The island's clock starts before seeding, so building the swarm counts against it
+    if budget is not None:
+        budget.start()
+    return budget
+
+
+def _cpu_epoch(task):
+    population, n_fireflies, generations, seed, budget = task
+    budget = _start(budget)
+    population_seed, swarm_seed = seed_sequence(seed).spawn(2)
+    inst = _instance
+    if population is None and inst.get("initial") is not None:
+        population = dfa.warm_initial_population(inst["initial"], inst["vm_cpu"], inst["pm_cpu"], n_fireflies,
+                                                 inst["repair_policy"], population_seed)
+    elif population is None:
+        population = dfa.initial_population(inst["vm_cpu"], inst["pm_cpu"], n_fireflies, inst["repair_policy"],
+                                            population_seed)
+    swarm = dfa.FireflySwarm(population, inst["vm_cpu"], inst["pm_cpu"],
+                             inst["p_idle"], inst["p_busy"], inst["repair_policy"], swarm_seed)
+    dfa.evolve(swarm, generations, inst["alpha"], inst["beta0"], inst["gamma"], stopping=budget)
+    return swarm.positions, swarm.costs, budget.evaluations if budget is not None else 0, _profile()
+
+
+def _multi_resource_epoch(task):
+    population, n_fireflies, generations, seed, budget = task
+    budget = _start(budget)
+    population_seed, swarm_seed = seed_sequence(seed).spawn(2)
+    vm_reqs, pm_caps = _instance["vm_reqs"], _instance["pm_caps"]
+    if population is None:
+        time_budget = 5.0
+        if budget is not None and budget.time_limit is not None:
+            time_budget = min(time_budget, budget.time_limit / 2)
+        population = multi_resource_dfa.starting_population(n_fireflies, vm_reqs, pm_caps, time_budget,
+                                                            population_seed, _instance.get("initial"))
+    # Kept per worker across epochs: fireflies returning to this worker start from it
+    cache = _instance.setdefault("fitness_cache", multi_resource_dfa.FitnessCache())
+    fits = np.zeros(len(population), dtype=np.float64)
+    multi_resource_dfa.evolve(population, fits, vm_reqs, pm_caps, generations, budget, swarm_seed, cache)
+    return population, fits, budget.evaluations if budget is not None else 0, _profile()
+
+
+# -------------------------------
+# Island Model Driver
+# -------------------------------
+def _split(total, parts):
+    # Sizes of parts that add up to total, each at least 2 fireflies
+    sizes = [total // parts + (1 if k < total % parts else 0) for k in range(parts)]
+    return [max(2, s) for s in sizes]
+
+
+def _migrate(populations, costs, migrants):
+    # Ring topology: each island's best fireflies replace the next island's worst
+    donors = [pop[np.argsort(c)[:migrants]].copy() for pop, c in zip(populations, costs)]
+    for k in range(len(populations)):
+        incoming = donors[k - 1]
+        worst = np.argsort(costs[k])[::-1][:len(incoming)]
+        populations[k][worst] = incoming
+
+
+def run_islands(epoch_fn, instance, island_sizes, iterations, migration_interval=10, migrants=1,
+                workers=None, seed=None, progress=None, cancel=None, stopping=None):
+    """Evolve independent sub-populations in a process pool with periodic migration.
+
+    progress(generation, best_cost, best_solution) is called after every
+    epoch; setting the cancel event stops at the next epoch boundary.
+    stopping (a StoppingCriteria) is checked between epochs, and each island
+    gets a share of the remaining deadline and evaluation budget.
+    Returns (best_solution, best_cost, island_stats).
+    """
+    n_islands = len(island_sizes)
+    if workers is None:
+        workers = min(n_islands, os.cpu_count() or 1)
+    chunks = [migration_interval] * (iterations // migration_interval)
+    if iterations % migration_interval:
+        chunks.append(iterations % migration_interval)
+    seeds = np.random.default_rng(seed).integers(0, 2**32 - 1, size=(max(len(chunks), 1), n_islands))
+
+    populations = [None] * n_islands
+    costs = [None] * n_islands
+    stats = [{"island": k, "fireflies": size, "generations": 0, "best_cost": float("inf"), "history": []}
+             for k, size in enumerate(island_sizes)]
+
+    def run_epoch(map_fn, epoch, generations):
+        budgets = [None] * n_islands
+        if stopping is not None:
+            # Islands run in waves of `workers` (one at a time inline); each
+            # gets its wave's share of the time left, capped by the driver's deadline
+            waves = math.ceil(n_islands / max(1, workers))
+            budgets = [stopping.remaining(n_islands, waves) for _ in range(n_islands)]
+        tasks = [(populations[k], island_sizes[k], generations, seeds[epoch, k], budgets[k])
+                 for k in range(n_islands)]
+        for k, (population, fits, evaluations, profile) in enumerate(map_fn(epoch_fn, tasks)):
+            if stopping is not None:
+                stopping.count(evaluations)
+            if profile is not None:
+                profiler.merge(profile)
+            populations[k] = population
+            costs[k] = fits
+            stats[k]["generations"] += generations
+            stats[k]["best_cost"] = float(np.min(fits))
+            stats[k]["history"].append(stats[k]["best_cost"])
+
+    def best_so_far():
+        k = int(np.argmin([s["best_cost"] for s in stats]))
+        return stats[k]["best_cost"], populations[k][int(np.argmin(costs[k]))].copy()
+
+    def run_all(map_fn):
+        for epoch, generations in enumerate(chunks or [0]):
+            if epoch and cancel is not None and cancel.is_set():
+                if stopping is not None:
+                    stopping.finish("cancelled")
+                break
+            run_epoch(map_fn, epoch, generations)
+            if progress is not None:
+                progress(stats[0]["generations"], *best_so_far())
+            if stopping is not None and stopping.update(best_so_far()[0], generations):
+                break
+            if migrants and epoch < len(chunks) - 1:
+                _migrate(populations, costs, migrants)
+
+    if stopping is not None and stopping.started_at is None:
+        stopping.start()
+    if workers <= 1:
+        _init_worker(instance)
+        run_all(map)
+    else:
+        # Workers keep their own profiler; their counters come back with every epoch
+        instance = dict(instance, worker_profile=profiler.enabled)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(instance,)) as pool:
+            run_all(pool.map)
+
+    if stopping is not None:
+        stopping.finish()
+    best_cost, best_solution = best_so_far()
+    return best_solution, best_cost, stats
+
+
+def island_optimize(vm_cpu, pm_cpu, n_islands=4, workers=None, num_fireflies=dfa.num_fireflies,
+                    iterations=dfa.iterations, migration_interval=10, migrants=1, seed=None,
+                    alpha=dfa.alpha, beta0=dfa.beta0, gamma=dfa.gamma, p_idle=P_idle, p_busy=P_busy,
+                    repair_policy="first", progress=None, cancel=None, stopping=None, initial=None):
+    # CPU-only DFA; num_fireflies is the total population, split across islands.
+    # initial warm-starts every island from a previous placement (see dfa.optimize)
+    vm_cpu = np.asarray(vm_cpu, dtype=np.float64)
+    pm_cpu = np.asarray(pm_cpu, dtype=np.float64)
+    instance = {"vm_cpu": vm_cpu, "pm_cpu": pm_cpu, "p_idle": p_idle, "p_busy": p_busy,
+                "alpha": alpha, "beta0": beta0, "gamma": gamma, "repair_policy": repair_policy, "initial": initial}
+    if stopping is not None and stopping.needs_bound():
+        stopping.lower_bound = lower_bound(vm_cpu, pm_cpu, p_idle, p_busy)
+    best_solution, _, stats = run_islands(_cpu_epoch, instance, _split(num_fireflies, n_islands), iterations,
+                                          migration_interval, migrants, workers, seed, progress, cancel, stopping)
+    best_cost = float(batch_power_consumption(best_solution, vm_cpu, pm_cpu, p_idle, p_busy)[0][0])
+    return best_solution, best_cost, stats
+
+
+def island_firefly_algorithm(vm_reqs, pm_caps, n_islands=4, workers=None, n_fireflies=30, max_gen=100,
+                             migration_interval=10, migrants=1, seed=None, progress=None, cancel=None,
+                             stopping=None, initial=None):
+    # Multi-resource (CPU/RAM) DFA; n_fireflies is the total population, split across islands.
+    # initial warm-starts every island when it is feasible (see multi_resource_dfa.firefly_algorithm)
+    instance = {"vm_reqs": np.asarray(vm_reqs), "pm_caps": np.asarray(pm_caps), "initial": initial}
+    if stopping is not None and stopping.needs_bound():
+        stopping.lower_bound = lower_bound(vm_reqs, pm_caps)
+    return run_islands(_multi_resource_epoch, instance, _split(n_fireflies, n_islands), max_gen,
+                       migration_interval, migrants, workers, seed, progress, cancel, stopping)
@@ -0,0 +1,315 @@
+import hashlib
+
+import numpy as np
+from bounds import lower_bound
+from instance import POP_DTYPE
+from instrumentation import profiler, timed
+from random_streams import generator, seed_sequence, spawn_streams
+from result_cache import ResultCache
+from seeding import seed_population
+from warm_start import PERTURB_RATE
+
+# -------------------------------
+# Power Model
+# -------------------------------
+def power_consumption(cpu_used, ram_used, pm_cpu, pm_ram, pidle=162, pbusy=215):
+    if cpu_used == 0 and ram_used == 0:
+        return 0
+    usage = max(cpu_used / pm_cpu, ram_used / pm_ram)
+    return pidle + usage * (pbusy - pidle)
+
+def pm_power(usage, pm_caps, pidle=162, pbusy=215):
+    # Power of every PM row in a (PMs x resources) usage matrix
+    ratio = (usage / pm_caps).max(axis=-1)
+    return np.where(usage.any(axis=-1), pidle + ratio * (pbusy - pidle), 0.0)
+
+# -------------------------------
+# Placement State
+# -------------------------------
+class PlacementState:
+    """Live (PMs x resources) usage for one assignment, updated move by move.
+
+    The solution array is modified in place; moves are journaled so a
+    rejected candidate can be rolled back without rebuilding anything.
+    With a FitnessCache, an assignment seen before starts from its cached
+    usage instead of being summed up VM by VM.
+    """
+
+    def __init__(self, solution, vm_reqs, pm_caps, cache=None):
+        self.solution = solution
+        self.vm_reqs = vm_reqs
+        self.pm_caps = pm_caps
+        self.usage = cache.usage(solution, vm_reqs, pm_caps) if cache is not None else None
+        if self.usage is None:
+            self.usage = np.zeros(pm_caps.shape, dtype=np.result_type(vm_reqs, pm_caps))
+            np.add.at(self.usage, solution, vm_reqs)
+            if cache is not None:
+                cache.record(solution, self.usage)
+        self.pm_power = pm_power(self.usage, pm_caps)
+        self.total_power = float(self.pm_power.sum())
+        self.overloaded = int(np.any(self.usage > pm_caps, axis=1).sum())
+        self.journal = []
+
+    def fits(self, vm, pm):
+        # Can VM vm move to PM pm without exceeding any resource there?
+        extra = 0 if self.solution[vm] == pm else self.vm_reqs[vm]
+        return bool(np.all(self.usage[pm] + extra <= self.pm_caps[pm]))
+
+    def is_feasible(self):
+        return self.overloaded == 0
+
+    def objective(self):
+        # What the swarm minimizes; subclasses add terms (see consolidation.MigrationState)
+        return self.total_power
+
+    def _update_pm(self, pm, delta):
+        usage, caps = self.usage[pm], self.pm_caps[pm]
+        was_over = bool(np.any(usage > caps))
+        usage += delta
+        self.overloaded += bool(np.any(usage > caps)) - was_over
+        power = pm_power(usage, caps)
+        self.total_power += power - self.pm_power[pm]
+        self.pm_power[pm] = power
+
+    def _move(self, vm, pm):
+        old = self.solution[vm]
+        self._update_pm(old, -self.vm_reqs[vm])
+        self._update_pm(pm, self.vm_reqs[vm])
+        self.solution[vm] = pm
+        return old
+
+    def move(self, vm, pm):
+        if self.solution[vm] != pm:
+            self.journal.append((vm, self._move(vm, pm)))
+
+    def checkpoint(self):
+        return len(self.journal)
+
+    def rollback(self, mark=0):
+        while len(self.journal) > mark:
+            vm, pm = self.journal.pop()
+            self._move(vm, pm)
+
+    def commit(self):
+        self.journal.clear()
+
+# -------------------------------
+# Fitness: Total Power
+# -------------------------------
+def fitness(solution, vm_reqs, pm_caps, cache=None):
+    profiler.count("fitness_evaluations")
+    return PlacementState(solution, vm_reqs, pm_caps, cache).total_power
+
+class FitnessCache(ResultCache):
+    """Per-PM usage of recently scored assignments, LRU-bounded.
+
+    Keyed by a 128-bit digest of the solution bytes. A hit copies a
+    (PMs x resources) matrix instead of re-adding every VM, which is what
+    duplicate seeds and fireflies returning to an island epoch cost.
+    Valid for one (vm_reqs, pm_caps) instance; maxsize bounds the memory
+    to maxsize usage matrices.
+    """
+
+    def __init__(self, maxsize=256):
+        super().__init__(maxsize)
+
+    @staticmethod
+    def key(solution):
+        return hashlib.blake2b(np.ascontiguousarray(solution).tobytes(), digest_size=16).digest()
+
+    def usage(self, solution, vm_reqs, pm_caps):
+        # A fresh copy of the cached usage, or None on a miss
+        usage = self.get(self.key(solution))
+        if usage is None:
+            profiler.count("fitness_cache_misses")
+            return None
+        profiler.count("fitness_cache_hits")
+        return usage.copy()
+
+    def record(self, solution, usage):
+        evictions = self.evictions
+        self.put(self.key(solution), usage.copy())
+        if self.evictions > evictions:
+            profiler.count("fitness_cache_evictions", self.evictions - evictions)
+
+# -------------------------------
+# Feasibility
+# -------------------------------
+def is_feasible(solution, vm_reqs, pm_caps):
+    return PlacementState(solution, vm_reqs, pm_caps).is_feasible()
+
+def warm_usable(solution, vm_reqs, pm_caps):
+    # A warm start must place every VM without over-committing a PM
+    solution = np.asarray(solution)
+    return len(solution) == len(vm_reqs) and bool((solution >= 0).all()) and is_feasible(solution, vm_reqs, pm_caps)
+
+# -------------------------------
+# Firefly Movement
+# -------------------------------
+def hamming_distance(a, b):
+    return np.sum(a != b)
+
+@timed("move_firefly")
+def move_toward(state, fj, beta0=1.0, gamma=1.0, rng=None):
+    # Moves state toward fj in place; rolls back and returns False if the result is infeasible.
+    # rng is the moving firefly's Generator (a fresh unseeded one if None)
+    rng = generator(rng)
+    mark = state.checkpoint()
+    fi = state.solution
+    diff = np.flatnonzero(fi != fj)
+    beta = beta0 * np.exp(-gamma * (len(diff) ** 2))
+    if beta > 0:  # underflows to 0 beyond a few differing VMs: no draws needed
+        for vm in diff[rng.random(len(diff)) < beta]:
+            state.move(vm, fj[vm])
+
+    # Mutation: change one VM's PM randomly (if it remains feasible)
+    if rng.random() < 0.1:
+        idx = int(rng.integers(len(fi)))
+        for pm in rng.permutation(len(state.pm_caps)):
+            if state.fits(idx, pm):
+                trial = state.checkpoint()
+                state.move(idx, pm)
+                if state.is_feasible():
+                    break
+                state.rollback(trial)
+
+    if state.is_feasible():
+        return True
+    state.rollback(mark)
+    return False
+
+def move_firefly(fi, fj, vm_reqs, pm_caps, beta0=1.0, gamma=1.0, rng=None):
+    state = PlacementState(fi.copy(), vm_reqs, pm_caps)
+    return state.solution if move_toward(state, fj, beta0, gamma, rng) else fi
+
+# -------------------------------
+# Initialize Fireflies
+# -------------------------------
+def initialize_population(n_fireflies, num_vms, num_pms, vm_reqs, pm_caps, time_budget=5.0, seed=None):
+    # Constructive seeding (randomized FFD / best-fit / dot-product); raises
+    # InfeasibleInstanceError instead of sampling forever on tight instances
+    return seed_population(n_fireflies, vm_reqs, pm_caps, time_budget, seed=seed)
+
+def warm_fireflies(initial, n_fireflies, vm_reqs, pm_caps, rate=PERTURB_RATE, seed=None):
+    # Firefly 0 is the (feasible) previous placement; the others move about
+    # rate of its VMs to random PMs that still have room, so they stay feasible
+    rng = generator(seed)
+    initial = np.asarray(initial, dtype=POP_DTYPE)
+    population = [initial.copy()]
+    for _ in range(n_fireflies - 1):
+        state = PlacementState(initial.copy(), vm_reqs, pm_caps)
+        vms = np.flatnonzero(rng.random(len(initial)) < rate)
+        for vm, pm in zip(vms.tolist(), rng.integers(0, len(pm_caps), size=len(vms)).tolist()):
+            if state.fits(vm, pm):
+                state.move(vm, pm)
+        population.append(state.solution)
+    return np.array(population)
+
+def starting_population(n_fireflies, vm_reqs, pm_caps, time_budget=5.0, seed=None, initial=None):
+    # Constructive seeding, or with a usable warm start half warm fireflies
+    # and half constructive ones, so churn-worn placements cannot hold the run back
+    if initial is None or not warm_usable(initial, vm_reqs, pm_caps):
+        return initialize_population(n_fireflies, len(vm_reqs), len(pm_caps), vm_reqs, pm_caps, time_budget, seed)
+    warm_seed, cold_seed = seed_sequence(seed).spawn(2)
+    n_warm = max(1, n_fireflies - n_fireflies // 2)
+    fireflies = warm_fireflies(initial, n_warm, vm_reqs, pm_caps, seed=warm_seed)
+    if n_fireflies == n_warm:
+        return fireflies
+    cold = initialize_population(n_fireflies - n_warm, len(vm_reqs), len(pm_caps), vm_reqs, pm_caps, time_budget,
+                                 cold_seed)
+    return np.concatenate([fireflies, cold.astype(fireflies.dtype)])
+
+# -------------------------------
+# Main DFA Algorithm
+# -------------------------------
+def evolve(fireflies, fits, vm_reqs, pm_caps, max_gen, stopping=None, seed=None, cache=None,
+           make_state=PlacementState, progress=None, cancel=None):
+    # Runs up to max_gen generations in place on fireflies/fits; stopping
+    # (a StoppingCriteria) may end the run early and records why. Each
+    # firefly moves with its own random stream spawned from seed. Moves that
+    # change nothing are skipped without scoring. fits is filled in from the
+    # fireflies' states, so callers need not score them first. With cache (a
+    # FitnessCache) duplicate fireflies build their state from it, and the
+    # final fireflies are recorded for a later evolve on the same instance.
+    # make_state builds each firefly's state, whose objective() is minimized;
+    # progress(generation, best_fit, best) and cancel work as in dfa.evolve
+    n_fireflies = len(fireflies)
+    rngs = spawn_streams(seed, n_fireflies)
+    states = [make_state(f, vm_reqs, pm_caps, cache=cache) for f in fireflies]
+    fits[:] = [state.objective() for state in states]
+    profiler.count("fitness_evaluations", n_fireflies)
+    best = fireflies[np.argmin(fits)].copy()
+    best_fit = min(fits)
+    if stopping is not None:
+        if stopping.started_at is None:
+            stopping.start()
+        if stopping.reached(best_fit) or stopping.exhausted():
+            return best, best_fit
+
+    for gen in range(max_gen):
+        if cancel is not None and cancel.is_set():
+            if stopping is not None:
+                stopping.finish("cancelled")
+            break
+        out_of_budget = False
+        for i in range(n_fireflies):
+            for j in range(n_fireflies):
+                if fits[j] < fits[i]:
+                    if stopping is not None and stopping.exhausted():
+                        out_of_budget = True
+                        break
+                    state = states[i]
+                    mark = state.checkpoint()
+                    move_toward(state, fireflies[j], rng=rngs[i])
+                    if state.checkpoint() == mark:
+                        # Nothing moved (or the move was rolled back): same firefly, same power
+                        profiler.count("noop_moves")
+                        continue
+                    if stopping is not None:
+                        stopping.count()
+                    profiler.count("fitness_evaluations")
+                    if state.objective() < fits[i]:
+                        fits[i] = state.objective()
+                        state.commit()
+                        profiler.count("moves_accepted")
+                    else:
+                        state.rollback(mark)
+                        profiler.count("moves_rejected")
+            if out_of_budget:
+                break
+
+        current_best = fireflies[np.argmin(fits)]
+        current_fit = min(fits)
+        if current_fit < best_fit:
+            best = current_best.copy()
+            best_fit = current_fit
+        if progress is not None:
+            progress(gen + 1, best_fit, best)
+        if out_of_budget or (stopping is not None and stopping.update(best_fit)):
+            break
+
+    if stopping is not None:
+        stopping.finish()
+    if cache is not None:
+        for state in states:
+            cache.record(state.solution, state.usage)
+    return best, best_fit
+
+def firefly_algorithm(vm_reqs, pm_caps, n_fireflies=30, max_gen=100, seed_time_budget=5.0, stopping=None, seed=None,
+                      cache=None, initial=None):
+    # initial (PM index per VM, e.g. from warm_start.adapt_placement) seeds
+    # half the fireflies when it places every VM feasibly (see starting_population)
+    if stopping is not None:
+        stopping.start()
+        if stopping.needs_bound():
+            stopping.lower_bound = lower_bound(vm_reqs, pm_caps)
+        if stopping.time_limit is not None:
+            # Leave most of the deadline to the search itself
+            seed_time_budget = min(seed_time_budget, stopping.time_limit / 2)
+    population_seed, swarm_seed = seed_sequence(seed).spawn(2)
+    fireflies = starting_population(n_fireflies, vm_reqs, pm_caps, seed_time_budget, population_seed, initial)
+    if cache is None:
+        cache = FitnessCache()
+    # Seeding pads the population with copies when it runs out of time; those start from the cache
+    fits = np.zeros(len(fireflies), dtype=np.float64)
+    return evolve(fireflies, fits, vm_reqs, pm_caps, max_gen, stopping, swarm_seed, cache)
@@ -0,0 +1,233 @@
+import time
+
+import numpy as np
+from background_run import OptimizationJob
+from capacity_index import CapacityIndex
+from dfa import FireflySwarm, evolve, initial_population
+from instance import POP_DTYPE
+from packing import pack
+from power_model import P_idle, P_busy
+from stopping import StoppingCriteria
+
+EVENTS = ("arrive", "depart", "resize")
+
+
+# -------------------------------
+# Online Placement Engine
+# -------------------------------
+class OnlinePlacement:
+    """Places a stream of VM arrivals, departures and resizes on a fixed fleet.
+
+    Each event is handled against a CapacityIndex over residual CPU, so an
+    arrival costs one O(log PMs) lookup instead of a re-solve. Every
+    consolidate_every events (or on consolidate()) a time-bounded DFA pass
+    runs on a snapshot in a background thread; its placement is applied on a
+    later event only if it still fits and uses less power, which switches
+    off the PMs it empties.
+    """
+
+    def __init__(self, pm_cpu, pm_ids=None, policy="best", p_idle=P_idle, p_busy=P_busy,
+                 consolidate_every=None, time_limit=1.0, num_fireflies=10, iterations=50, background=True):
+        self.pm_cpu = np.asarray(pm_cpu, dtype=np.float64)
+        self.pm_ids = list(pm_ids) if pm_ids is not None else [f"PM{i+1}" for i in range(len(self.pm_cpu))]
+        self.policy = policy
+        self.p_idle = p_idle
+        self.p_busy = p_busy
+        self.consolidate_every = consolidate_every
+        self.time_limit = time_limit
+        self.num_fireflies = num_fireflies
+        self.iterations = iterations
+        self.background = background
+
+        self.index = CapacityIndex(self.pm_cpu, policy)
+        self.usage = [0.0] * len(self.pm_cpu)
+        self.hosted = [0] * len(self.pm_cpu)
+        self.vms = {}  # vm_id -> [pm, cpu]
+        self.job = None
+        self._snapshot = None
+        self._since_consolidation = 0
+        self.stats = {"events": 0, "placed": 0, "rejected": 0, "departed": 0, "resized": 0, "moved_on_resize": 0,
+                      "consolidations": 0, "consolidations_applied": 0, "migrations": 0,
+                      "event_seconds": 0.0, "max_event_seconds": 0.0}
+
+    # ---- bookkeeping ----
+    def _put(self, vm_id, pm, cpu):
+        self.index.allocate(pm, cpu)
+        self.usage[pm] += cpu
+        self.hosted[pm] += 1
+        self.vms[vm_id] = [pm, cpu]
+
+    def _remove(self, vm_id):
+        pm, cpu = self.vms.pop(vm_id)
+        self.index.release(pm, cpu)
+        self.usage[pm] -= cpu
+        self.hosted[pm] -= 1
+        if not self.hosted[pm]:
+            self.usage[pm] = 0.0  # no float residue from the += / -= history
+        return pm, cpu
+
+    # ---- events ----
+    def arrive(self, vm_id, cpu):
+        # Host for a new VM, or None (rejected) if no PM has room
+        if vm_id in self.vms:
+            raise ValueError(f"VM '{vm_id}' is already placed")
+        cpu = float(cpu)
+        pm = self.index.find(cpu)
+        if pm is None:
+            self.stats["rejected"] += 1
+            return None
+        self._put(vm_id, pm, cpu)
+        self.stats["placed"] += 1
+        return pm
+
+    def depart(self, vm_id):
+        pm = self._remove(vm_id)[0]
+        self.stats["departed"] += 1
+        return pm
+
+    def resize(self, vm_id, cpu):
+        # Grow or shrink in place if the host has room, else move; None if it fits nowhere (size unchanged)
+        cpu = float(cpu)
+        old_pm, old_cpu = self._remove(vm_id)
+        if self.index.residual(old_pm) >= cpu:
+            pm = old_pm
+        else:
+            pm = self.index.find(cpu)
+            if pm is None:
+                self._put(vm_id, old_pm, old_cpu)
+                self.stats["rejected"] += 1
+                return None
+            self.stats["moved_on_resize"] += 1
+        self._put(vm_id, pm, cpu)
+        self.stats["resized"] += 1
+        return pm
+
+    def handle(self, event):
+        """Apply one event dict: {"type": "arrive" | "resize", "id": ..., "cpu": ...} or {"type": "depart", "id": ...}.
+
+        Returns the VM's PM index (None if rejected, its old PM on departure).
+        """
+        start = time.perf_counter()
+        kind = event["type"]
+        if kind == "arrive":
+            pm = self.arrive(event["id"], event["cpu"])
+        elif kind == "depart":
+            pm = self.depart(event["id"])
+        elif kind == "resize":
+            pm = self.resize(event["id"], event["cpu"])
+        else:
+            raise ValueError(f"Unknown event type '{kind}', expected one of {EVENTS}")
+        elapsed = time.perf_counter() - start
+        self.stats["events"] += 1
+        self.stats["event_seconds"] += elapsed
+        self.stats["max_event_seconds"] = max(self.stats["max_event_seconds"], elapsed)
+
+        self.poll()
+        self._since_consolidation += 1
+        if self.consolidate_every and self._since_consolidation >= self.consolidate_every:
+            self.consolidate()
+        return pm
+
+    def run(self, events):
+        # Feed an iterable of event dicts; yields (event, pm) as each is handled
+        for event in events:
+            yield event, self.handle(event)
+
+    # ---- consolidation ----
+    def consolidate(self, wait=None):
+        """Start a DFA consolidation pass on the current placement.
+
+        The swarm is seeded with the live placement and an FFD packing of
+        the same VMs and is bounded by time_limit seconds. With wait (default:
+        not background) the result is applied before returning.
+        Returns False if a pass is already running or there is nothing to place.
+        """
+        if self.job is not None and self.job.running:
+            return False
+        self._since_consolidation = 0
+        if not self.vms:
+            return False
+        vm_ids = list(self.vms)
+        current = np.fromiter((self.vms[v][0] for v in vm_ids), dtype=POP_DTYPE, count=len(vm_ids))
+        vm_cpu = np.fromiter((self.vms[v][1] for v in vm_ids), dtype=np.float64, count=len(vm_ids))
+        self._snapshot = (vm_ids, vm_cpu)
+
+        def target(progress=None, cancel=None):
+            stopping = StoppingCriteria(time_limit=self.time_limit)
+            stopping.start()  # the time limit covers seeding the swarm too
+            population = initial_population(vm_cpu, self.pm_cpu, max(2, self.num_fireflies))
+            population[0] = current
+            packed = pack(vm_cpu, self.pm_cpu, "ffd")
+            if (packed >= 0).all():
+                population[1] = packed
+            swarm = FireflySwarm(population, vm_cpu, self.pm_cpu, self.p_idle, self.p_busy, self.policy)
+            return evolve(swarm, self.iterations, progress=progress, cancel=cancel,
+                          stopping=stopping)
+
+        self.job = OptimizationJob(target, self.iterations).start()
+        self.stats["consolidations"] += 1
+        wait = not self.background if wait is None else wait
+        if wait:
+            self.job.join()
+            self.poll()
+        return True
+
+    def poll(self):
+        # Apply a finished consolidation pass if it is still valid; True if applied
+        job = self.job
+        if job is None or job.status in ("pending", "running"):
+            return False
+        self.job = None
+        if job.status != "done" or job.result is None:
+            return False
+        vm_ids, vm_cpu = self._snapshot
+        solution = job.result[0]
+
+        # VMs that departed or were resized since the snapshot keep their live placement
+        target = {}
+        for vm_id, pm, cpu in zip(vm_ids, solution.tolist(), vm_cpu.tolist()):
+            live = self.vms.get(vm_id)
+            if live is not None and live[1] == cpu and live[0] != pm:
+                target[vm_id] = pm
+        if not target:
+            return False
+        usage = np.array(self.usage)
+        hosted = np.array(self.hosted)
+        for vm_id, pm in target.items():
+            old_pm, cpu = self.vms[vm_id]
+            usage[old_pm] -= cpu
+            usage[pm] += cpu
+            hosted[old_pm] -= 1
+            hosted[pm] += 1
+        if np.any(usage > self.pm_cpu + 1e-9) or self._power(usage, hosted) >= self.power():
+            return False
+
+        for vm_id, pm in target.items():
+            cpu = self._remove(vm_id)[1]
+            self._put(vm_id, pm, cpu)
+        self.stats["consolidations_applied"] += 1
+        self.stats["migrations"] += len(target)
+        return True
+
+    # ---- reporting ----
+    def _power(self, usage, hosted):
+        # A PM is on while it hosts a VM; usage alone can carry float residue
+        usage = np.asarray(usage, dtype=np.float64)
+        on = np.asarray(hosted) > 0
+        return float(np.where(on, self.p_idle + (self.p_busy - self.p_idle) * (usage / self.pm_cpu), 0.0).sum())
+
+    def power(self):
+        return self._power(self.usage, self.hosted)
+
+    def active_pms(self):
+        return sum(1 for count in self.hosted if count)
+
+    def placement(self):
+        # {vm_id: pm_id} for every hosted VM
+        return {vm_id: self.pm_ids[pm] for vm_id, (pm, _) in self.vms.items()}
+
+    def summary(self):
+        events = self.stats["events"]
+        return {**self.stats,
+                "mean_event_us": self.stats["event_seconds"] / events * 1e6 if events else 0.0,
+                "vms": len(self.vms), "active_pms": self.active_pms(), "total_power": self.power()}
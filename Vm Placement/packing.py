@@ -0,0 +1,81 @@
+import numpy as np
+
+from capacity_index import CapacityIndex
+from instance import POP_DTYPE
+from power_model import P_idle, P_busy
+
+MODES = {
+    "ff": "First-Fit (input order)",
+    "ffd": "First-Fit Decreasing",
+    "bfd": "Best-Fit Decreasing",
+    "nf": "Next-Fit",
+}
+
+
+# -------------------------------
+# Packing Modes
+# -------------------------------
+def _pack_indexed(order, vm_cpu, pm_cpu, policy, allocation):
+    # VMs of equal size are placed as a run: first-fit and best-fit both keep
+    # filling the PM they picked until it is too full, so one lookup per PM
+    # touched replaces one lookup per VM
+    index = CapacityIndex(pm_cpu, policy)
+    sizes = vm_cpu[order]
+    run_starts = np.flatnonzero(np.r_[True, sizes[1:] != sizes[:-1]])
+    run_ends = np.r_[run_starts[1:], len(order)]
+    for start, end in zip(run_starts.tolist(), run_ends.tolist()):
+        size = float(sizes[start])
+        while start < end:
+            pm = index.find(size)
+            if pm is None:
+                break  # this size no longer fits anywhere; smaller runs may still fit
+            count = min(end - start, max(1, int(index.residual(pm) // size))) if size > 0 else end - start
+            allocation[order[start:start + count]] = pm
+            index.allocate(pm, size * count)
+            start += count
+
+
+def _pack_next_fit(vm_cpu, pm_cpu, allocation):
+    pm, residual = 0, float(pm_cpu[0])
+    for vm_idx, size in enumerate(vm_cpu.tolist()):
+        while size > residual and pm < len(pm_cpu) - 1:
+            pm += 1
+            residual = float(pm_cpu[pm])
+        if size <= residual:
+            allocation[vm_idx] = pm
+            residual -= size
+
+
+def pack(vm_cpu, pm_cpu, mode="ffd"):
+    """Place VMs on PMs; returns an allocation array with -1 for unplaced VMs."""
+    if mode not in MODES:
+        raise ValueError(f"Unknown packing mode '{mode}', expected one of {tuple(MODES)}")
+    vm_cpu = np.asarray(vm_cpu, dtype=np.float64)
+    pm_cpu = np.asarray(pm_cpu, dtype=np.float64)
+    allocation = np.full(len(vm_cpu), -1, dtype=POP_DTYPE)
+    if len(vm_cpu) == 0 or len(pm_cpu) == 0:
+        return allocation
+
+    if mode == "nf":
+        _pack_next_fit(vm_cpu, pm_cpu, allocation)
+    elif mode == "ff":
+        _pack_indexed(np.arange(len(vm_cpu)), vm_cpu, pm_cpu, "first", allocation)
+    else:
+        order = np.argsort(-vm_cpu, kind="stable")
+        _pack_indexed(order, vm_cpu, pm_cpu, "first" if mode == "ffd" else "best", allocation)
+    return allocation
+
+
+# -------------------------------
+# Utilization and Power Report
+# -------------------------------
+def placement_report(allocation, vm_cpu, pm_cpu, p_idle=P_idle, p_busy=P_busy):
+    # Returns (used, utilization, power, total_power) per PM; unplaced VMs are ignored
+    allocation = np.asarray(allocation)
+    vm_cpu = np.asarray(vm_cpu, dtype=np.float64)
+    pm_cpu = np.asarray(pm_cpu, dtype=np.float64)
+    placed = allocation >= 0
+    used = np.bincount(allocation[placed], weights=vm_cpu[placed], minlength=len(pm_cpu))
+    utilization = used / pm_cpu
+    power = np.where(used > 0, p_idle + (p_busy - p_idle) * utilization, 0.0)
+    return used, utilization, power, float(power.sum())
@@ -0,0 +1,40 @@
+import numpy as np
+from instrumentation import profiler, timed
+
+# -------------------------------
+# Power Model Parameters
+# -------------------------------
+P_idle = 162
+P_busy = 215
+
+
+# -------------------------------
+# Batched Power Consumption
+# -------------------------------
+@timed("power_consumption")
+def batch_power_consumption(assignments, vm_cpu, pm_cpu, p_idle=P_idle, p_busy=P_busy):
+    """Score a (fireflies x VMs) matrix of PM indices in one call.
+
+    Returns (total_power, pm_power, usage) with shapes (F,), (F, PMs), (F, PMs).
+    """
+    assignments = np.asarray(assignments)
+    if assignments.ndim == 1:
+        assignments = assignments[np.newaxis, :]
+    pm_cpu = np.asarray(pm_cpu, dtype=np.float64)
+    n_rows, n_vms = assignments.shape
+    profiler.count("fitness_evaluations", n_rows)
+    n_pms = len(pm_cpu)
+
+    # Scatter-add every row into its own block of PM slots
+    flat = (assignments + (np.arange(n_rows) * n_pms)[:, np.newaxis]).ravel()
+    weights = np.broadcast_to(np.asarray(vm_cpu, dtype=np.float64), (n_rows, n_vms)).ravel()
+    usage = np.bincount(flat, weights=weights, minlength=n_rows * n_pms).reshape(n_rows, n_pms)
+
+    pm_power = np.where(usage > 0, p_idle + (p_busy - p_idle) * (usage / pm_cpu), 0.0)
+    total_power = pm_power.sum(axis=1)
+    return total_power, pm_power, usage
+
+
+def power_consumption(assignment, vm_cpu, pm_cpu, p_idle=P_idle, p_busy=P_busy):
+    total, pm_power, usage = batch_power_consumption(assignment, vm_cpu, pm_cpu, p_idle, p_busy)
+    return float(total[0]), pm_power[0], usage[0]
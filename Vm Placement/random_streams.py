@@ -0,0 +1,27 @@
+import numpy as np
+
+# Every stochastic step draws from a numpy Generator derived from one seed, so
+# a run is reproduced by its seed alone (None draws fresh OS entropy). Each
+# firefly owns an independent stream: the numbers it sees do not depend on
+# how many other fireflies ran before it, in this process or another.
+
+
+def seed_sequence(seed=None):
+    # int, None, SeedSequence or Generator -> SeedSequence
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    if isinstance(seed, np.random.Generator):
+        return seed.bit_generator.seed_seq
+    return np.random.SeedSequence(seed)
+
+
+def spawn_streams(seed, n):
+    # n independent Generators, one per firefly
+    return [np.random.default_rng(child) for child in seed_sequence(seed).spawn(n)]
+
+
+def generator(seed=None):
+    # One Generator for the non-per-firefly steps (initial population, seeding)
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed_sequence(seed))
@@ -0,0 +1,128 @@
+import time
+
+import numpy as np
+
+from instance import POP_DTYPE
+from instrumentation import timed
+from random_streams import generator
+
+
+class InfeasibleInstanceError(ValueError):
+    pass
+
+
+# -------------------------------
+# Quick Infeasibility Checks
+# -------------------------------
+def check_instance(vm_reqs, pm_caps):
+    # Raises InfeasibleInstanceError when no placement can possibly exist
+    if len(pm_caps) == 0:
+        raise InfeasibleInstanceError("Instance is infeasible: there are no PMs to place VMs on.")
+    total_demand = vm_reqs.sum(axis=0)
+    total_capacity = pm_caps.sum(axis=0)
+    short = np.flatnonzero(total_demand > total_capacity)
+    if len(short):
+        r = short[0]
+        raise InfeasibleInstanceError(
+            f"Instance is infeasible: total demand {total_demand[r]} exceeds total capacity "
+            f"{total_capacity[r]} for resource {r}.")
+    homeless = [vm for vm in range(len(vm_reqs)) if not np.any(np.all(pm_caps >= vm_reqs[vm], axis=1))]
+    if homeless:
+        raise InfeasibleInstanceError(
+            f"Instance is infeasible: VM{homeless[0] + 1} ({list(vm_reqs[homeless[0]])}) "
+            f"does not fit on any PM" + (f" (and {len(homeless) - 1} more)" if len(homeless) > 1 else "") + ".")
+
+
+# -------------------------------
+# Constructive Heuristics
+# -------------------------------
+def _first_fit(rank):
+    return lambda fits, req, residual, caps: fits[np.argmin(rank[fits])]
+
+
+def _best_fit(fits, req, residual, caps):
+    # Tightest remaining slack, normalized per resource
+    return fits[np.argmin(((residual[fits] - req) / caps[fits]).sum(axis=1))]
+
+
+def _dot_product(fits, req, residual, caps):
+    # Best alignment between the VM's demand and the PM's free resources
+    return fits[np.argmax(((req / caps[fits]) * (residual[fits] / caps[fits])).sum(axis=1))]
+
+
+def construct(order, vm_reqs, pm_caps, choose):
+    # Places VMs in order on the PM picked by choose; None if some VM does not fit
+    residual = pm_caps.astype(np.float64)
+    solution = np.empty(len(vm_reqs), dtype=POP_DTYPE)
+    for vm in order:
+        req = vm_reqs[vm]
+        fits = np.flatnonzero(np.all(residual >= req, axis=1))
+        if len(fits) == 0:
+            return None
+        pm = choose(fits, req, residual, pm_caps)
+        residual[pm] -= req
+        solution[vm] = pm
+    return solution
+
+
+def _decreasing_order(vm_reqs, pm_caps, noise, rng):
+    size = (vm_reqs / pm_caps.max(axis=0)).sum(axis=1)
+    return np.argsort(-size * rng.uniform(1 - noise, 1 + noise, size=len(size)), kind="stable")
+
+
+def randomized_ffd(vm_reqs, pm_caps, noise=0.1, rng=None):
+    rng = generator(rng)
+    rank = np.argsort(rng.permutation(len(pm_caps)))
+    return construct(_decreasing_order(vm_reqs, pm_caps, noise, rng), vm_reqs, pm_caps, _first_fit(rank))
+
+
+def randomized_bfd(vm_reqs, pm_caps, noise=0.1, rng=None):
+    return construct(_decreasing_order(vm_reqs, pm_caps, noise, generator(rng)), vm_reqs, pm_caps, _best_fit)
+
+
+def randomized_dot_product(vm_reqs, pm_caps, noise=0.1, rng=None):
+    return construct(_decreasing_order(vm_reqs, pm_caps, noise, generator(rng)), vm_reqs, pm_caps, _dot_product)
+
+
+HEURISTICS = (randomized_ffd, randomized_bfd, randomized_dot_product)
+
+
+# -------------------------------
+# Population Seeding
+# -------------------------------
+@timed("seed_population")
+def seed_population(n_fireflies, vm_reqs, pm_caps, time_budget=5.0, noise=0.1, max_attempts=None, seed=None):
+    """Build n_fireflies feasible, mostly distinct placements within time_budget seconds.
+
+    Heuristics are cycled with increasing randomization. Raises
+    InfeasibleInstanceError if the instance is provably infeasible or no
+    heuristic finds a placement in time.
+    """
+    vm_reqs = np.asarray(vm_reqs)
+    pm_caps = np.asarray(pm_caps)
+    check_instance(vm_reqs, pm_caps)
+
+    rng = generator(seed)
+    deadline = time.perf_counter() + time_budget
+    if max_attempts is None:
+        max_attempts = 20 * n_fireflies
+    population, seen = [], set()
+    attempt = 0
+    while len(population) < n_fireflies:
+        heuristic = HEURISTICS[attempt % len(HEURISTICS)]
+        solution = heuristic(vm_reqs, pm_caps, min(1.0, noise * (1 + attempt // len(HEURISTICS))), rng)
+        attempt += 1
+        if solution is not None and solution.tobytes() not in seen:
+            seen.add(solution.tobytes())
+            population.append(solution)
+        if time.perf_counter() > deadline or attempt >= max_attempts:
+            break
+
+    if not population:
+        raise InfeasibleInstanceError(
+            f"No feasible placement found within {time_budget:g}s after {attempt} constructive attempts; "
+            f"the instance is too tight or infeasible.")
+    # Out of time (or out of distinct solutions): fill up with copies of what we have
+    while len(population) < n_fireflies:
+        population.append(population[len(population) % len(seen)].copy())
+    return np.array(population)
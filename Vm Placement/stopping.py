@@ -0,0 +1,122 @@
+import math
+import time
+
+REASONS = ("max_iterations", "stall", "target", "gap", "deadline", "max_evaluations", "cancelled")
+
+
+class StoppingCriteria:
+    """Early-stopping rules shared by the firefly loops.
+
+    stall_generations: stop after this many generations without improving the best cost
+    target_cost: stop once the best cost is at or below this value (W)
+    time_limit: wall-clock budget in seconds, counted from start()
+    deadline: absolute time.time() at which to stop, comparable across
+        processes (island workers get the driver's deadline through remaining())
+    max_evaluations: budget of scored moves (fitness evaluations)
+    max_gap: stop once (best cost - lower_bound) / best cost is at most this;
+        the solver fills in lower_bound (see bounds.lower_bound) if it is None
+
+    After a run, reason names the criterion that fired ("max_iterations" if
+    the loop simply ran out of generations).
+    """
+
+    def __init__(self, stall_generations=None, target_cost=None, time_limit=None, max_evaluations=None,
+                 max_gap=None, lower_bound=None, min_improvement=1e-9, deadline=None):
+        self.stall_generations = stall_generations
+        self.target_cost = target_cost
+        self.time_limit = time_limit
+        self.max_evaluations = max_evaluations
+        self.max_gap = max_gap
+        self.lower_bound = lower_bound
+        self.min_improvement = min_improvement
+        self.deadline = deadline
+        self.reset()
+
+    def reset(self):
+        self.started_at = None
+        self.reason = None
+        self.evaluations = 0
+        self.generations = 0
+        self.best_cost = math.inf
+        self.stalled = 0
+
+    def start(self):
+        self.reset()
+        self.started_at = time.perf_counter()
+        return self
+
+    def elapsed(self):
+        return time.perf_counter() - self.started_at if self.started_at is not None else 0.0
+
+    def count(self, evaluations=1):
+        self.evaluations += evaluations
+
+    def exhausted(self):
+        # Hard budgets, cheap enough to check between two move evaluations
+        if self.time_limit is not None and self.elapsed() >= self.time_limit:
+            self.reason = "deadline"
+        elif self.deadline is not None and time.time() >= self.deadline:
+            self.reason = "deadline"
+        elif self.max_evaluations is not None and self.evaluations >= self.max_evaluations:
+            self.reason = "max_evaluations"
+        return self.reason is not None
+
+    def needs_bound(self):
+        return self.max_gap is not None and self.lower_bound is None
+
+    def gap(self, best_cost=None):
+        best_cost = self.best_cost if best_cost is None else best_cost
+        if self.lower_bound is None or not math.isfinite(best_cost):
+            return None
+        return (best_cost - self.lower_bound) / best_cost if best_cost > 0 else 0.0
+
+    def reached(self, best_cost):
+        self.best_cost = min(self.best_cost, best_cost)
+        if self.target_cost is not None and best_cost <= self.target_cost:
+            self.reason = "target"
+        elif self.max_gap is not None and self.lower_bound is not None:
+            # Below the bound means over-committed, which is not a reason to stop
+            if 0 <= self.gap(best_cost) <= self.max_gap:
+                self.reason = "gap"
+        return self.reason is not None
+
+    def update(self, best_cost, generations=1):
+        # Called after every generation (or batch of generations) with the best
+        # cost so far; True means stop
+        self.generations += generations
+        if best_cost < self.best_cost - self.min_improvement:
+            self.stalled = 0
+        else:
+            self.stalled += generations
+        self.best_cost = min(self.best_cost, best_cost)
+        if self.reached(best_cost):
+            return True
+        if self.stall_generations is not None and self.stalled >= self.stall_generations:
+            self.reason = "stall"
+            return True
+        return self.exhausted()
+
+    def finish(self, reason="max_iterations"):
+        if self.reason is None:
+            self.reason = reason
+        return self.reason
+
+    def remaining(self, share=1, time_share=1):
+        # Fresh criteria with a share of what is left of the hard budgets (for island workers).
+        # time_share is the number of waves the islands run in; the absolute
+        # deadline caps every island however late its wave starts
+        time_limit = deadline = None
+        if self.time_limit is not None:
+            left = max(0.0, self.time_limit - self.elapsed())
+            time_limit = left / time_share
+            deadline = time.time() + left
+        if self.deadline is not None:
+            deadline = self.deadline if deadline is None else min(deadline, self.deadline)
+        max_evaluations = (None if self.max_evaluations is None
+                           else max(0, self.max_evaluations - self.evaluations) // share)
+        return StoppingCriteria(time_limit=time_limit, max_evaluations=max_evaluations, deadline=deadline)
+
+    def summary(self):
+        return {"reason": self.reason, "generations": self.generations,
+                "evaluations": self.evaluations, "elapsed": self.elapsed(),
+                "lower_bound": self.lower_bound, "gap": self.gap()}
@@ -1,6 +1,6 @@
 import streamlit as st
 import numpy as np
-import random
+from random_streams import spawn_streams
 
 st.title("VM to PM Allocation using Firefly Algorithm")
 
@@ -28,6 +28,7 @@ alpha = 0.2
 beta0 = 1.0
 gamma = 1.0
 num_fireflies = 20
+seed = st.number_input("Random seed (same seed, same result):", min_value=0, value=0, step=1)
 iterations = 50
 
 num_VMs = len(VMs)
@@ -63,14 +64,14 @@ def generate_firefly():
 def distance(f1, f2):
     return np.sqrt(sum((i - j)**2 for i, j in zip(f1, f2)))
 
-def move_firefly(f1, f2):
-    new_f = f1[:]
-    for i in range(num_VMs):
-        if random.random() < beta0 * np.exp(-gamma * (f1[i] - f2[i])**2):
-            new_f[i] = f2[i]
-        if random.random() < alpha:
-            new_f[i] = random.randint(0, num_PMs - 1)
-    return repair_solution(new_f)
+def move_firefly(f1, f2, rng):
+    # Attraction and mutation masks for every VM in one draw from the firefly's stream
+    f1, f2 = np.asarray(f1), np.asarray(f2)
+    draws = rng.random((2, num_VMs))
+    new_f = np.where(draws[0] < beta0 * np.exp(-gamma * (f1 - f2) ** 2), f2, f1)
+    mutate = draws[1] < alpha
+    new_f[mutate] = rng.integers(0, num_PMs, size=int(mutate.sum()))
+    return repair_solution(new_f.tolist())
 
 def repair_solution(solution):
     pm_resources = [PMs[i]["cpu"] for i in range(num_PMs)]
@@ -90,6 +91,7 @@ if st.button("Run Firefly Algorithm"):
         st.warning("Please enter both VM and PM details.")
     else:
         fireflies = [generate_firefly() for _ in range(num_fireflies)]
+        rngs = spawn_streams(int(seed), num_fireflies)
         costs = [power_consumption(f)[0] for f in fireflies]
 
         best_solution = fireflies[np.argmin(costs)]
@@ -99,7 +101,7 @@ if st.button("Run Firefly Algorithm"):
             for i in range(num_fireflies):
                 for j in range(num_fireflies):
                     if costs[j] < costs[i]:
-                        new_solution = move_firefly(fireflies[i], fireflies[j])
+                        new_solution = move_firefly(fireflies[i], fireflies[j], rngs[i])
                         new_cost = power_consumption(new_solution)[0]
                         if new_cost < costs[i]:
                             fireflies[i] = new_solution
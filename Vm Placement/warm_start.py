@@ -0,0 +1,101 @@
+import csv
+import io
+import json
+
+import numpy as np
+from capacity_index import POLICIES, CapacityIndex
+from instance import POP_DTYPE
+from random_streams import generator
+
+# Share of VMs moved at random in each perturbed copy of the warm solution
+PERTURB_RATE = 0.05
+
+
+# -------------------------------
+# Previous Placements
+# -------------------------------
+def load_placement(text):
+    """{vm_id: pm_id} from a JSON object or a CSV with "VM ID" and "Assigned PM" columns.
+
+    The CSV is the assignment export of the Streamlit app; empty PM cells
+    (unplaced VMs) are skipped.
+    """
+    text = text.strip()
+    if text.startswith("{"):
+        return {str(vm): str(pm) for vm, pm in json.loads(text).items()}
+    rows = csv.DictReader(io.StringIO(text))
+    if rows.fieldnames is None or not {"VM ID", "Assigned PM"} <= set(rows.fieldnames):
+        raise ValueError("placement CSV needs 'VM ID' and 'Assigned PM' columns")
+    return {row["VM ID"]: row["Assigned PM"] for row in rows if row["Assigned PM"]}
+
+
+def _pick(residual, caps, req, policy):
+    # Host for one VM over every resource, or None
+    fits = np.flatnonzero((residual >= req).all(axis=1))
+    if len(fits) == 0:
+        return None
+    if policy == "first":
+        return int(fits[0])
+    # Best fit leaves the least (normalized) room behind, worst fit the most
+    left = ((residual[fits] - req) / caps[fits]).max(axis=1)
+    return int(fits[np.argmin(left) if policy == "best" else np.argmax(left)])
+
+
+def adapt_placement(instance, previous, policy="best"):
+    """Carry a previous {vm_id: pm_id} placement over to instance.
+
+    VMs whose PM still exists keep it while it has room (in VM order); new
+    VMs, VMs on removed PMs and VMs that no longer fit are re-homed largest
+    first with the fit policy over every resource of the instance.
+    Returns (solution, unplaced VM indices); unplaced VMs hold -1.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown fit policy '{policy}', expected one of {POLICIES}")
+    solution = instance.solution_from_ids(previous)
+    vm_reqs, pm_caps = instance.vm_reqs, instance.pm_caps
+    residual = pm_caps.copy()
+    for vm, pm in enumerate(solution.tolist()):
+        if pm >= 0:
+            if (vm_reqs[vm] <= residual[pm]).all():
+                residual[pm] -= vm_reqs[vm]
+            else:
+                solution[vm] = -1
+
+    homeless = np.flatnonzero(solution < 0)
+    homeless = homeless[np.argsort(-(vm_reqs[homeless] / pm_caps.max(axis=0)).sum(axis=1), kind="stable")]
+    unplaced = []
+    if len(homeless) and pm_caps.shape[1] == 1:
+        index = CapacityIndex(residual[:, 0], policy)
+        for vm in homeless.tolist():
+            pm = index.place(float(vm_reqs[vm, 0]))
+            if pm is None:
+                unplaced.append(vm)
+            else:
+                solution[vm] = pm
+    else:
+        for vm in homeless.tolist():
+            pm = _pick(residual, pm_caps, vm_reqs[vm], policy)
+            if pm is None:
+                unplaced.append(vm)
+            else:
+                solution[vm] = pm
+                residual[pm] -= vm_reqs[vm]
+    return solution, sorted(unplaced)
+
+
+# -------------------------------
+# Warm Populations
+# -------------------------------
+def warm_population(initial, n_fireflies, num_pms, rate=PERTURB_RATE, seed=None):
+    """Firefly 0 is initial, the others are copies with about rate of their VMs moved at random.
+
+    Unplaced (-1) VMs get a random PM as well; callers repair the rows.
+    """
+    rng = generator(seed)
+    initial = np.asarray(initial, dtype=POP_DTYPE)
+    population = np.repeat(initial[np.newaxis, :], n_fireflies, axis=0)
+    move = rng.random(population.shape) < rate
+    move[0] = False
+    move |= population < 0
+    population[move] = rng.integers(0, num_pms, size=int(move.sum()), dtype=POP_DTYPE)
+    return population
@@ -0,0 +1,279 @@
+"""Headless batch solver for VM placement and container allocation instances.
+
+Reads instances from JSON / JSON-lines / CSV files (or stdin with "-") and
+streams one JSON result per instance to stdout. Only NumPy and the solver
+modules are imported on this path: no Streamlit, matplotlib or pandas.
+
+    python batch_solve.py instances.jsonl --algorithm ffd
+    cat cluster.csv | python batch_solve.py - --format csv --algorithm dfa
+
+JSON instance (VM placement; "ram" is needed for mr-dfa):
+    {"id": "i1", "vms": [{"id": "VM1", "cpu": 12, "ram": 4}, ...],
+     "pms": [{"id": "PM1", "cpu": 50, "ram": 64}, ...]}
+An optional "previous": {"VM1": "PM1", ...} placement warm-starts dfa and
+mr-dfa: VMs keep their old PM where it still has room, the rest are re-homed.
+
+JSON instance (container allocation; allocation holds 1-based VM indexes and
+is searched for with --heuristic plus local search when it is left out):
+    {"id": "c1", "type": "container", "containers": [{"name": "A", "length": 1000}, ...],
+     "vms": [{"mips": 500, "cost_per_sec": 0.2, "p_idle": 100, "p_max": 200}, ...],
+     "allocation": [1, 2, ...]}
+
+CSV rows: instance,kind,id,cpu,ram for VM placement (kind is vm or pm), or
+instance,kind,name,length,mips,cost_per_sec,p_idle,p_max,assign for container
+instances (kind is container or vm).
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, "Vm Placement"))
+sys.path.insert(0, os.path.join(ROOT, "Adaptive Container Project"))
+
+import numpy as np  # noqa: E402
+
+PACKING_ALGORITHMS = ("ff", "ffd", "bfd", "nf")
+ALGORITHMS = PACKING_ALGORITHMS + ("dfa", "mr-dfa")
+CONTAINER_HEURISTICS = ("min-min", "max-min", "eft")
+
+
+# -------------------------------
+# Instance Readers
+# -------------------------------
+def _number(value):
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+class MalformedRecord(Exception):
+    """A JSON-lines record that does not parse, yielded in its place so the batch carries on."""
+
+    def __init__(self, line, error):
+        super().__init__(f"{type(error).__name__}: {error}")
+        self.line = line
+
+
+def read_json(text):
+    text = text.strip()
+    if not text:
+        return
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        # JSON lines: one instance per line
+        for n, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError(f"expected a JSON object, got {type(record).__name__}")
+            except ValueError as e:
+                yield MalformedRecord(n, e)
+            else:
+                yield record
+        return
+    if isinstance(data, list):
+        yield from data
+    else:
+        yield data
+
+
+def read_csv(text):
+    instances = {}
+    for row in csv.DictReader(io.StringIO(text)):
+        instances.setdefault(row.get("instance") or "1", []).append(row)
+    for name, rows in instances.items():
+        if any(row["kind"] == "container" for row in rows):
+            containers = [row for row in rows if row["kind"] == "container"]
+            instance = {
+                "id": name,
+                "type": "container",
+                "containers": [{"name": row["name"], "length": float(row["length"])} for row in containers],
+                "vms": [{"mips": float(row["mips"]), "cost_per_sec": float(row["cost_per_sec"]),
+                         "p_idle": float(row["p_idle"]), "p_max": float(row["p_max"])}
+                        for row in rows if row["kind"] == "vm"],
+            }
+            if all(row.get("assign") for row in containers):
+                instance["allocation"] = [int(row["assign"]) for row in containers]
+            yield instance
+        else:
+            def machine(row):
+                item = {"id": row["id"], "cpu": _number(row["cpu"])}
+                if row.get("ram"):
+                    item["ram"] = _number(row["ram"])
+                return item
+            yield {"id": name,
+                   "vms": [machine(row) for row in rows if row["kind"] == "vm"],
+                   "pms": [machine(row) for row in rows if row["kind"] == "pm"]}
+
+
+def read_instances(path, fmt=None):
+    if path == "-":
+        text = sys.stdin.read()
+    else:
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+    if fmt is None:
+        fmt = "csv" if path.lower().endswith(".csv") else "json"
+    return read_csv(text) if fmt == "csv" else read_json(text)
+
+
+# -------------------------------
+# Solvers
+# -------------------------------
+def make_stopping(args):
+    from stopping import StoppingCriteria
+    return StoppingCriteria(args.stall, args.target_power, args.time_limit, args.max_evals, args.gap)
+
+
+def solve_placement(instance, args):
+    from instance import Instance
+    VMs, PMs = instance["vms"], instance["pms"]
+    model = Instance.from_dicts(VMs, PMs)
+    vm_cpu, pm_cpu = model.vm_cpu, model.pm_cpu
+    algorithm = instance.get("algorithm", args.algorithm)
+    previous = instance.get("previous")
+    stopping = None
+
+    from packing import pack, placement_report
+    if algorithm in PACKING_ALGORITHMS:
+        allocation = pack(vm_cpu, pm_cpu, algorithm)
+        total_power = placement_report(allocation, vm_cpu, pm_cpu)[3]
+    elif algorithm == "dfa":
+        from capacity_index import repair_solution
+        from dfa import optimize
+        from warm_start import adapt_placement
+        stopping = make_stopping(args)
+        initial = adapt_placement(model, previous)[0] if previous else None
+        allocation = optimize(vm_cpu, pm_cpu, num_fireflies=args.fireflies, iterations=args.iterations,
+                              stopping=stopping, seed=args.seed, initial=initial)[0]
+        # Report the repaired placement: VMs that fit nowhere are unplaced and draw no power
+        allocation, unplaced = repair_solution(allocation.copy(), vm_cpu, pm_cpu)
+        allocation[unplaced] = -1
+        total_power = placement_report(allocation, vm_cpu, pm_cpu)[3]
+    elif algorithm == "mr-dfa":
+        from multi_resource_dfa import firefly_algorithm
+        from warm_start import adapt_placement
+        if any("ram" not in item for item in VMs + PMs):
+            raise ValueError("mr-dfa needs a 'ram' value on every VM and PM")
+        model = Instance.from_dicts(VMs, PMs, resources=("cpu", "ram"))
+        stopping = make_stopping(args)
+        initial = adapt_placement(model, previous)[0] if previous else None
+        allocation, total_power = firefly_algorithm(model.vm_reqs, model.pm_caps, n_fireflies=args.fireflies,
+                                                    max_gen=args.iterations, stopping=stopping, seed=args.seed,
+                                                    initial=initial)
+    else:
+        raise ValueError(f"Unknown algorithm '{algorithm}', expected one of {ALGORITHMS}")
+
+    from bounds import lower_bound, optimality_gap
+    bound = lower_bound(model.vm_reqs, model.pm_caps) if algorithm == "mr-dfa" else lower_bound(vm_cpu, pm_cpu)
+    record = {
+        "algorithm": algorithm,
+        "total_power": round(float(total_power), 6),
+        "lower_bound": round(bound, 6),
+        "gap": round(optimality_gap(float(total_power), bound), 6),
+        "assignment": model.assignment(allocation),
+        "unplaced": [model.vm_ids[v] for v in np.flatnonzero(np.asarray(allocation) < 0).tolist()],
+    }
+    if stopping is not None:
+        record["stopped_by"] = stopping.reason
+        record["generations"] = stopping.generations
+        record["evaluations"] = stopping.evaluations
+    return record
+
+
+def solve_container(instance, args):
+    from objective import DEFAULT_WEIGHTS, evaluate_allocation
+    weights = instance.get("weights", DEFAULT_WEIGHTS)
+    if "allocation" in instance:
+        algorithm, allocation = "evaluate", instance["allocation"]
+    else:
+        from allocator import TIME_LIMIT, allocate
+        algorithm = instance.get("heuristic", args.heuristic)
+        time_limit = TIME_LIMIT if args.time_limit is None else args.time_limit
+        allocation = allocate(instance["containers"], instance["vms"], algorithm, weights,
+                              improve=not args.no_local_search, time_limit=time_limit, seed=args.seed)
+        if not args.no_local_search:
+            algorithm += "+local-search"
+    result = evaluate_allocation(instance["containers"], instance["vms"], allocation, weights)
+    return {
+        "algorithm": algorithm,
+        "allocation": allocation,
+        "makespan": result["makespan"],
+        "total_cost": result["total_cost"],
+        "total_energy": result["total_energy"],
+        "objective": result["objective"],
+    }
+
+
+def solve(instance, args):
+    if instance.get("type") == "container":
+        return solve_container(instance, args)
+    return solve_placement(instance, args)
+
+
+# -------------------------------
+# Main
+# -------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve placement instances from files and stream JSON lines.")
+    parser.add_argument("inputs", nargs="*", default=["-"], help="instance files (JSON, JSON lines or CSV); - for stdin")
+    parser.add_argument("--format", choices=("json", "csv"), help="input format (default: from file extension, json for stdin)")
+    parser.add_argument("--algorithm", choices=ALGORITHMS, default="ffd", help="placement algorithm (default: ffd)")
+    parser.add_argument("--heuristic", choices=CONTAINER_HEURISTICS, default="min-min",
+                        help="container instances without an allocation: list-scheduling heuristic (default: min-min)")
+    parser.add_argument("--no-local-search", action="store_true", help="container instances: skip the local-search improver")
+    parser.add_argument("--fireflies", type=int, default=20, help="DFA population size")
+    parser.add_argument("--iterations", type=int, default=50, help="DFA generations")
+    parser.add_argument("--stall", type=int, help="DFA: stop after this many generations without improvement")
+    parser.add_argument("--target-power", type=float, help="DFA: stop once total power is at most this many watts")
+    parser.add_argument("--time-limit", type=float,
+                        help="wall-clock deadline per instance in seconds, for the DFA runs and container "
+                             "allocation (which defaults to allocator.TIME_LIMIT, 5 s)")
+    parser.add_argument("--max-evals", type=int, help="DFA: maximum number of move evaluations per instance")
+    parser.add_argument("--gap", type=float, help="DFA: stop once the optimality gap is at most this fraction")
+    parser.add_argument("--seed", type=int, help="seed for reproducible DFA runs and local search")
+    parser.add_argument("--profile", action="store_true", help="add evaluation/repair counters and timers to each record")
+    parser.add_argument("--output", default="-", help="output file for JSON lines (default: stdout)")
+    args = parser.parse_args(argv)
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    failures = 0
+    try:
+        for path in args.inputs:
+            for n, instance in enumerate(read_instances(path, args.format)):
+                if isinstance(instance, MalformedRecord):
+                    failures += 1
+                    out.write(json.dumps({"instance": instance.line, "error": str(instance)}) + "\n")
+                    out.flush()
+                    continue
+                name = instance.get("id", f"{path}#{n + 1}")
+                start = time.perf_counter()
+                try:
+                    if args.profile:
+                        from instrumentation import profiling
+                        with profiling() as profiler:
+                            record = {"instance": name, **solve(instance, args)}
+                        record["profile"] = profiler.snapshot()
+                    else:
+                        record = {"instance": name, **solve(instance, args)}
+                except Exception as e:  # report and keep streaming the rest of the batch
+                    failures += 1
+                    record = {"instance": name, "error": f"{type(e).__name__}: {e}"}
+                record["elapsed"] = round(time.perf_counter() - start, 6)
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
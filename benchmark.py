@@ -0,0 +1,195 @@
+"""Benchmark the VM placement algorithms on seeded synthetic instances.
+
+Every (algorithm, resources, shape, size) case is generated with
+instance_generator and timed; the results are written as a JSON baseline
+that later runs can be compared against.
+
+    python benchmark.py --sizes 10,100,1000 --output baseline.json
+    python benchmark.py --sizes 10,100,1000 --compare baseline.json
+
+Recorded per case: wall time, fitness (move) evaluations per second for the
+DFA variants, peak traced memory (a second, traced run unless --no-memory),
+final total power, its optimality gap against bounds.lower_bound and the
+number of unplaced VMs. Cases the solver rejects as infeasible are kept
+with their error and total_power None, and the suite carries on.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, "Vm Placement"))
+
+import numpy as np  # noqa: E402
+
+from bounds import lower_bound, optimality_gap  # noqa: E402
+from instance_generator import SHAPES, generate  # noqa: E402
+from seeding import InfeasibleInstanceError  # noqa: E402
+from stopping import StoppingCriteria  # noqa: E402
+
+PACKING_ALGORITHMS = ("ff", "ffd", "bfd", "nf")
+ALGORITHMS = PACKING_ALGORITHMS + ("dfa", "mr-dfa")
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000)
+
+
+# -------------------------------
+# Cases
+# -------------------------------
+def run_case(algorithm, instance, args):
+    # Returns (total_power, unplaced, evaluations); evaluations is None for the packing heuristics
+    if algorithm in PACKING_ALGORITHMS:
+        from packing import pack, placement_report
+        allocation = pack(instance.vm_cpu, instance.pm_cpu, algorithm)
+        return placement_report(allocation, instance.vm_cpu, instance.pm_cpu)[3], int((allocation < 0).sum()), None
+
+    stopping = StoppingCriteria(time_limit=args.time_limit)
+    if algorithm == "dfa":
+        from capacity_index import repair_solution
+        from dfa import optimize
+        solution, total_power = optimize(instance.vm_cpu, instance.pm_cpu, num_fireflies=args.fireflies,
+                                         iterations=args.iterations, stopping=stopping, seed=args.seed)
+        unplaced = len(repair_solution(solution.copy(), instance.vm_cpu, instance.pm_cpu)[1])
+    else:
+        from multi_resource_dfa import firefly_algorithm, PlacementState
+        solution, total_power = firefly_algorithm(instance.vm_reqs, instance.pm_caps, n_fireflies=args.fireflies,
+                                                  max_gen=args.iterations, stopping=stopping, seed=args.seed)
+        state = PlacementState(solution, instance.vm_reqs, instance.pm_caps)
+        # VMs sitting on an over-committed PM count as unplaced
+        overloaded = np.flatnonzero(np.any(state.usage > instance.pm_caps, axis=1))
+        unplaced = int(np.isin(solution, overloaded).sum())
+    return total_power, unplaced, stopping.evaluations
+
+
+def measure(algorithm, instance, args):
+    start = time.perf_counter()
+    try:
+        total_power, unplaced, evaluations = run_case(algorithm, instance, args)
+    except InfeasibleInstanceError as e:
+        return {"wall_time": round(time.perf_counter() - start, 6), "evaluations": None, "evals_per_sec": None,
+                "peak_memory_bytes": None, "total_power": None, "gap": None, "unplaced": None, "error": str(e)}
+    wall_time = time.perf_counter() - start
+
+    bound = lower_bound(instance.vm_reqs, instance.pm_caps)
+    peak_memory = None
+    if args.memory:
+        # Separate traced run (same seed): tracemalloc slows allocation-heavy code down
+        tracemalloc.start()
+        run_case(algorithm, instance, args)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        "wall_time": round(wall_time, 6),
+        "evaluations": evaluations,
+        "evals_per_sec": round(evaluations / wall_time, 1) if evaluations is not None and wall_time > 0 else None,
+        "peak_memory_bytes": peak_memory,
+        "total_power": round(float(total_power), 6),
+        "gap": round(optimality_gap(float(total_power), bound), 6),
+        "unplaced": unplaced,
+    }
+
+
+def case_key(case):
+    return (case["algorithm"], case["resources"], case["shape"], case["num_vms"])
+
+
+def run_suite(args):
+    cases = []
+    for num_vms in args.sizes:
+        for shape in args.shapes:
+            instances = {}
+            for algorithm in args.algorithms:
+                resources = ("cpu", "ram") if algorithm == "mr-dfa" else ("cpu",)
+                if algorithm == "mr-dfa" and num_vms > args.max_mr_vms:
+                    continue
+                if resources not in instances:
+                    instances[resources] = generate(num_vms, resources=resources, shape=shape, seed=args.seed)
+                instance = instances[resources]
+                case = {"algorithm": algorithm, "resources": "+".join(resources), "shape": shape,
+                        "num_vms": num_vms, "num_pms": instance.num_pms}
+                case.update(measure(algorithm, instance, args))
+                cases.append(case)
+                if case["total_power"] is None:
+                    print(f"{algorithm:>6} {case['resources']:>7} {shape:>5} {num_vms:>7} VMs "
+                          f"{case['num_pms']:>6} PMs  failed: {case['error']}", file=sys.stderr)
+                    continue
+                print(f"{algorithm:>6} {case['resources']:>7} {shape:>5} {num_vms:>7} VMs "
+                      f"{case['num_pms']:>6} PMs  {case['wall_time']:9.3f}s  {case['total_power']:14.2f} W"
+                      f"  gap={case['gap'] * 100:.2f}%  unplaced={case['unplaced']}", file=sys.stderr)
+    return cases
+
+
+# -------------------------------
+# Baselines
+# -------------------------------
+def compare(cases, baseline):
+    # Ratio current / baseline for wall time and power, per matching case
+    previous = {case_key(case): case for case in baseline["cases"]}
+    rows = []
+    for case in cases:
+        old = previous.get(case_key(case))
+        if old is None or case["total_power"] is None or old["total_power"] is None:
+            continue
+        rows.append({
+            "case": "/".join(str(k) for k in case_key(case)),
+            "wall_time_ratio": round(case["wall_time"] / old["wall_time"], 3) if old["wall_time"] else None,
+            "power_ratio": round(case["total_power"] / old["total_power"], 4) if old["total_power"] else None,
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the VM placement algorithms on synthetic instances.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma-separated VM counts")
+    parser.add_argument("--shapes", default=",".join(SHAPES), help=f"comma-separated packing shapes {tuple(SHAPES)}")
+    parser.add_argument("--algorithms", default="ff,dfa,mr-dfa", help=f"comma-separated subset of {ALGORITHMS}")
+    parser.add_argument("--fireflies", type=int, default=20, help="DFA population size")
+    parser.add_argument("--iterations", type=int, default=50, help="DFA generations")
+    parser.add_argument("--time-limit", type=float, default=60.0, help="DFA wall-clock budget per case in seconds")
+    parser.add_argument("--max-mr-vms", type=int, default=10000, help="skip mr-dfa above this many VMs")
+    parser.add_argument("--seed", type=int, default=0, help="instance and solver seed")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="skip the traced peak-memory run")
+    parser.add_argument("--output", help="write the JSON baseline here")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    args = parser.parse_args(argv)
+    args.sizes = [int(s) for s in args.sizes.split(",")]
+    args.shapes = args.shapes.split(",")
+    args.algorithms = args.algorithms.split(",")
+    for algorithm in args.algorithms:
+        if algorithm not in ALGORITHMS:
+            parser.error(f"unknown algorithm '{algorithm}', expected one of {ALGORITHMS}")
+    for shape in args.shapes:
+        if shape not in SHAPES:
+            parser.error(f"unknown shape '{shape}', expected one of {tuple(SHAPES)}")
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": {"fireflies": args.fireflies, "iterations": args.iterations,
+                       "time_limit": args.time_limit, "seed": args.seed},
+        },
+        "cases": run_suite(args),
+    }
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            report["comparison"] = compare(report["cases"], json.load(f))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())